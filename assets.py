@@ -0,0 +1,142 @@
+"""
+Shared asset manager. Every image is loaded, colorkeyed and scaled once per (file, scale,
+size); the screens all get the same Surface objects. Colorkeyed sprites are RLE-encoded,
+so blitting them skips their transparent runs. Sounds live in audio.py.
+
+pack_atlas() copies the colorkeyed sprites into a single atlas surface and swaps the cached
+entries for subsurfaces of it. With a cache_dir, scaled pixels are also written to a
+diskcache.DiskCache and reused on the next launch for as long as the source file's mtime
+is unchanged, so startup skips PNG decoding and rescaling altogether.
+
+With max_bytes set, images outside the atlas are kept in least-recently-used order and the
+oldest are dropped once their pixels add up to more than max_bytes; dropped images are
+simply loaded again (from the disk cache, if there is one) the next time they're asked for.
+Atlas sprites share the atlas's pixels, so they stay.
+"""
+
+import struct
+import threading
+from collections import OrderedDict
+import pygame
+from diskcache import DiskCache
+
+BLACK = (0, 0, 0)
+ATLAS_WIDTH = 1024
+CACHE_HEADER = struct.Struct("<qHH") # source mtime_ns, width, height
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class Assets:
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.disk = DiskCache(cache_dir, ".rgb", CACHE_HEADER) if cache_dir else None
+        self.max_bytes = max_bytes
+        self.images = OrderedDict() # least recently used first
+        self.packed = set() # keys whose image is a subsurface of the atlas
+        self.nbytes = 0 # pixel bytes of the images outside the atlas
+        self.lock = threading.Lock() # the background loader fills the cache while the menu reads it
+        self.atlas = None
+
+    def image(self, filename, scale=None, size=None, colorkey=True, alpha=False):
+        """
+        The image at its in-game size. Colorkeyed sprites use BLACK as transparent; alpha
+        images keep their per-pixel alpha instead.
+        """
+        key = (filename, scale, size, colorkey, alpha)
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+        image = self.read_cache(key) if not alpha else None
+        if image is None:
+            image = self.load(filename, scale, size, alpha)
+            if not alpha:
+                self.write_cache(key, image)
+        if colorkey and not alpha:
+            image.set_colorkey(BLACK, pygame.RLEACCEL)
+        with self.lock:
+            if key not in self.images:
+                self.images[key] = image
+                self.nbytes += surface_bytes(image)
+                self.evict(keep=key)
+            return self.images[key]
+
+    def evict(self, keep=None):
+        """Drop the least recently used images outside the atlas until they fit in max_bytes."""
+        if self.max_bytes is None:
+            return
+        while self.nbytes > self.max_bytes:
+            victim = next((key for key in self.images if key not in self.packed and key != keep), None)
+            if victim is None:
+                return
+            self.nbytes -= surface_bytes(self.images.pop(victim))
+
+    def usage(self):
+        """(images cached, bytes of pixels behind them), counting the atlas once."""
+        with self.lock:
+            atlas = surface_bytes(self.atlas) if self.atlas is not None else 0
+            return len(self.images), self.nbytes + atlas
+
+    def load(self, filename, scale, size, alpha):
+        image = pygame.image.load(filename)
+        image = image.convert_alpha() if alpha else image.convert()
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+        elif scale is not None:
+            image = pygame.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+        return image
+
+    def read_cache(self, key):
+        if not self.disk:
+            return None
+        entry = self.disk.read(key[0], key[:3])
+        if entry is None:
+            return None
+        (w, h), pixels = entry
+        if len(pixels) != w * h * 3:
+            return None
+        return pygame.image.frombytes(pixels, (w, h), "RGB").convert()
+
+    def write_cache(self, key, image):
+        if self.disk:
+            self.disk.write(key[0], key[:3], image.get_size(), pygame.image.tobytes(image, "RGB"))
+
+    def pack_atlas(self):
+        """Copy every loaded colorkeyed sprite into one atlas and hand out subsurfaces of it."""
+        with self.lock:
+            return self._pack_atlas()
+
+    def _pack_atlas(self):
+        keys = [key for key in self.images if key[3] and not key[4]]
+        keys.sort(key=lambda k: self.images[k].get_height(), reverse=True)
+
+        # Shelf packing: fill rows left to right, each row as tall as its first sprite
+        places = {}
+        x = y = shelf = 0
+        for key in keys:
+            w, h = self.images[key].get_size()
+            if x + w > ATLAS_WIDTH:
+                x, y, shelf = 0, y + shelf, 0
+            places[key] = pygame.Rect(x, y, w, h)
+            x += w
+            shelf = max(shelf, h)
+        if not places:
+            return None
+
+        atlas = pygame.Surface((ATLAS_WIDTH, y + shelf)).convert()
+        atlas.fill(BLACK)
+        atlas.set_colorkey(BLACK)
+        for key, rect in places.items():
+            atlas.blit(self.images[key], rect)
+        for key, rect in places.items():
+            sprite = atlas.subsurface(rect)
+            sprite.set_colorkey(BLACK, pygame.RLEACCEL)
+            if key not in self.packed:
+                self.nbytes -= surface_bytes(self.images[key])
+                self.packed.add(key)
+            self.images[key] = sprite
+        self.atlas = atlas
+        return atlas
@@ -0,0 +1,109 @@
+"""
+Audio manager: preloaded sound effects on a fixed pool of prioritised channels, plus music.
+
+Every sound effect is decoded once by preload(). With a cache_dir the decoded PCM is also
+written to disk and reused on later launches for as long as the source file's mtime and
+the mixer's output format are unchanged, so startup skips MP3 decoding.
+
+play() picks a free channel from the pool. When all are busy, it steals the channel
+playing the lowest-priority sound (the oldest, on a tie), as long as that sound's priority
+is no higher than the new one; otherwise the new sound is dropped. A sound triggered
+again within `min_interval` seconds of its last play is also dropped, so a burst of
+pickups doesn't stack copies of the same effect.
+
+Music is left to pygame.mixer.music, which streams and decodes it on SDL's audio thread.
+"""
+
+import struct
+import time
+import pygame
+from diskcache import DiskCache
+
+CACHE_HEADER = struct.Struct("<qiii") # source mtime_ns, mixer frequency, format, channels
+
+
+def sound_bytes(sound):
+    mixer = pygame.mixer.get_init()
+    if mixer is None:
+        return 0
+    frequency, size, channels = mixer
+    return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+
+class AudioManager:
+    def __init__(self, sounds, cache_dir=None, num_channels=8, min_interval=0.05):
+        """`sounds` maps a name to (filename, priority, volume or None)."""
+        self.specs = sounds
+        self.disk = DiskCache(cache_dir, ".pcm", CACHE_HEADER) if cache_dir else None
+        self.min_interval = min_interval
+        self.sounds = {}
+        self.last_played = {}
+        pygame.mixer.set_num_channels(num_channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(num_channels)]
+        self.playing = [None] * num_channels # (priority, start time) of each channel's sound
+
+    def preload(self):
+        for name in self.specs:
+            self.sound(name)
+
+    def sound(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            filename, priority, volume = self.specs[name]
+            sound = self.read_cache(filename)
+            if sound is None:
+                sound = pygame.mixer.Sound(filename)
+                self.write_cache(filename, sound)
+            if volume is not None:
+                sound.set_volume(volume)
+            self.sounds[name] = sound
+        return sound
+
+    def usage(self):
+        """(sounds loaded, bytes of samples behind them)."""
+        sounds = list(self.sounds.values())
+        return len(sounds), sum(sound_bytes(sound) for sound in sounds)
+
+    def play(self, name):
+        """Play a sound effect. Returns the Channel it plays on, or None if it was dropped."""
+        now = time.perf_counter()
+        if now - self.last_played.get(name, -self.min_interval) < self.min_interval:
+            return None
+        priority = self.specs[name][1]
+        index = self.free_channel(priority)
+        if index is None:
+            return None
+        channel = self.channels[index]
+        channel.play(self.sound(name))
+        self.playing[index] = (priority, now)
+        self.last_played[name] = now
+        return channel
+
+    def free_channel(self, priority):
+        victim = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+            if self.playing[i] is None: # busy with a sound played outside the manager
+                continue
+            if self.playing[i][0] <= priority and (victim is None or self.playing[i] < self.playing[victim]):
+                victim = i
+        return victim
+
+    def play_music(self, filename, volume=0.5, loops=-1):
+        pygame.mixer.music.load(filename)
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops)
+
+    def read_cache(self, filename):
+        if not self.disk:
+            return None
+        entry = self.disk.read(filename, filename)
+        # Samples decoded for a different output format would play at the wrong pitch
+        if entry is None or entry[0] != pygame.mixer.get_init():
+            return None
+        return pygame.mixer.Sound(buffer=entry[1])
+
+    def write_cache(self, filename, sound):
+        if self.disk:
+            self.disk.write(filename, filename, pygame.mixer.get_init(), sound.get_raw())
@@ -0,0 +1,279 @@
+"""
+Benchmark harness for Asteroid Alley.
+
+Drives main_menu(), play_game() and shop_screen() with scripted input under SDL's dummy
+video and audio drivers, and measures:
+- startup: init_game() until the first menu frame is presented
+- menu_to_game: Enter on the menu until the first game frame is presented
+- frames/sec and p50/p95/p99 frame times for the menu, a seeded game run and the shop
+- the process's max RSS, and with --tracemalloc the peak Python allocations (tracing slows
+  every frame down, so frame times from a --tracemalloc run aren't comparable)
+
+The frame limiter is replaced by an uncapped clock so frame times measure work done, not
+time spent waiting, and the game runs one simulation tick per frame instead of following
+the wall clock. Everything runs in a scratch copy of the game directory, so the real
+save file, replays and sprite cache are never touched.
+
+Usage:
+    python benchmark.py                          # run and compare with benchmarks/baseline.json
+    python benchmark.py --save-baseline          # run and store the results as the new baseline
+    python benchmark.py --threshold 15 --json out.json
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import pygame
+from profiler import percentile
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+HIGHER_IS_BETTER = ("fps",)
+
+
+class UncappedClock:
+    """Stands in for pygame.time.Clock without sleeping, so loops run flat out."""
+
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def tick(self, framerate=0):
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        return int(elapsed * 1000)
+
+
+class ScriptedInput:
+    """
+    Replaces pygame's event queue, keyboard state, mouse position and display presents with
+    a per-screen script, and timestamps every presented frame.
+    """
+
+    def __init__(self, menu_frames, shop_frames):
+        self.menu_frames = menu_frames
+        self.shop_frames = shop_frames
+        self.mode = None
+        self.frame = 0
+        self.presents = []
+        self.real_get = pygame.event.get
+        self.real_flip = pygame.display.flip
+        self.real_update = pygame.display.update
+
+    def install(self):
+        pygame.event.get = self.get_events
+        pygame.key.get_pressed = self.get_pressed
+        pygame.mouse.get_pos = self.get_pos
+        pygame.display.flip = self.flip
+        pygame.display.update = self.update
+
+    def start(self, mode):
+        self.mode = mode
+        self.frame = 0
+        self.presents = []
+
+    def flip(self):
+        self.real_flip()
+        self.presents.append(time.perf_counter())
+
+    def update(self, rects=None):
+        self.real_update(rects) if rects is not None else self.real_update()
+        self.presents.append(time.perf_counter())
+
+    def get_events(self, *args, **kwargs):
+        self.real_get() # keep SDL's queue drained
+        self.frame += 1
+        events = []
+        enter = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN)
+        click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=self.get_pos())
+        if self.mode == "menu" and self.frame >= self.menu_frames:
+            events.append(enter)
+        elif self.mode == "game":
+            # The game loop ignores Enter; the game-over screen takes it as soon as it's up
+            events.append(enter)
+        elif self.mode == "shop" and self.frame >= self.shop_frames:
+            events.append(click)
+        return events
+
+    def get_pressed(self):
+        held = set()
+        if self.mode == "game":
+            # Sweep right then left across the screen
+            phase = (self.frame // 40) % 2
+            held.add(pygame.K_RIGHT if phase == 0 else pygame.K_LEFT)
+        return HeldKeys(held)
+
+    def get_pos(self):
+        if self.mode == "shop":
+            if self.frame >= self.shop_frames:
+                return (40, 30) # Back button
+            cell = (self.frame // 20) % 6
+            return (100 + 100 * (cell % 3), 255 + 100 * (cell // 3))
+        if self.mode == "menu":
+            # Hover over Start, then Shop, then nothing
+            return [(200, 385), (200, 455), (50, 300)][(self.frame // 30) % 3]
+        return (0, 0)
+
+
+class HeldKeys:
+    """Indexable by key constant like the result of pygame.key.get_pressed()."""
+
+    def __init__(self, held):
+        self.held = held
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def frame_stats(*runs):
+    """Frame rate and frame-time percentiles over one or more lists of present timestamps."""
+    times = sorted((b - a) * 1000 for presents in runs for a, b in zip(presents, presents[1:]))
+    if not times:
+        return {"fps": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "frames": 0}
+    return {
+        "fps": round(len(times) / (sum(times) / 1000), 1),
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "frames": len(times),
+    }
+
+
+def make_workdir():
+    """Scratch copy of the game's data so runs can write saves and caches freely."""
+    workdir = tempfile.mkdtemp(prefix="asteroid-alley-bench-")
+    for name in ("images", "audio"):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(workdir, name))
+    shutil.copy(os.path.join(ROOT, "save-data.json"), workdir)
+    return workdir
+
+
+def run_benchmark(menu_frames=300, game_frames=1800, shop_frames=300, seed=1, trace_memory=False):
+    workdir = make_workdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        script = ScriptedInput(menu_frames, shop_frames)
+        script.install()
+        import main_game
+
+        # Startup and menu
+        script.start("menu")
+        start = time.perf_counter()
+        main_game.init_game()
+        main_game.clock = UncappedClock()
+        main_game.lockstep = True
+        main_game.main_menu()
+        results = {"startup_ms": round((script.presents[0] - start) * 1000, 2)}
+        results["menu"] = frame_stats(script.presents)
+        left_menu = time.perf_counter()
+
+        # Seeded game runs, back to back until enough frames have been played
+        runs = []
+        while sum(len(run) for run in runs) < game_frames and len(runs) < 100:
+            script.start("game")
+            main_game.play_game(seed=seed + len(runs), max_frames=game_frames)
+            if not runs:
+                results["menu_to_game_ms"] = round((script.presents[0] - left_menu) * 1000, 2)
+            # The last present is the game-over screen
+            runs.append(script.presents[:-1])
+        results["game"] = frame_stats(*runs)
+
+        # Shop
+        script.start("shop")
+        main_game.shop_screen()
+        results["shop"] = frame_stats(script.presents)
+        main_game.save.close()
+
+        if trace_memory:
+            results["peak_python_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            results["max_rss_mb"] = round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+        return results
+    finally:
+        tracemalloc.stop()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif key != "frames":
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of (metric, baseline, current, change %) that got worse than threshold %."""
+    regressions = []
+    current = flatten(results)
+    for metric, old in flatten(baseline).items():
+        new = current.get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old * 100
+        worse = -change if metric.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        if worse > threshold:
+            regressions.append((metric, old, new, worse))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Asteroid Alley under SDL's dummy drivers.")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="fail when a metric is this many percent worse than the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    parser.add_argument("--game-frames", type=int, default=1800)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python allocations")
+    args = parser.parse_args()
+
+    results = run_benchmark(game_frames=args.game_frames, seed=args.seed, trace_memory=args.tracemalloc)
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.threshold)
+    for metric, old, new, worse in regressions:
+        print(f"REGRESSION {metric}: {old} -> {new} ({worse:.1f}% worse)")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions over {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
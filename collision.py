@@ -0,0 +1,81 @@
+"""
+Collision helpers: a process-wide cache of sprite masks and a two-phase overlap test.
+
+Masks are keyed by (filename, scale, size), so building the shapes for a new run reuses the
+masks from earlier runs instead of decoding and rescaling the images again. The cache holds
+at most `mask_cache_capacity` masks and drops the least recently used beyond that.
+
+collide() rejects pairs whose bounding rects don't touch before doing the pixel-mask test;
+since asteroids sit in fixed-width lanes and mostly far above the player, nearly every pair
+stops at the rect test.
+"""
+
+from collections import OrderedDict
+import pygame
+
+BLACK = (0, 0, 0)
+
+mask_cache_capacity = 128
+_mask_cache = OrderedDict()
+
+
+def _opaque(image):
+    # Same pixels as Surface.convert() on a non-alpha display, but works without a display
+    return pygame.image.frombytes(pygame.image.tobytes(image, "RGB"), image.get_size(), "RGB")
+
+
+def load_sprite(filename, scale=None, size=None):
+    """Load a colorkeyed sprite at its in-game size without needing a display."""
+    image = _opaque(pygame.image.load(filename))
+    image.set_colorkey(BLACK)
+    if size is not None:
+        image = pygame.transform.scale(image, size)
+    elif scale is not None:
+        image = pygame.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+    return image
+
+
+class Hitbox:
+    """A collision mask together with its size, so the broad phase needs no C calls."""
+
+    __slots__ = ("mask", "width", "height")
+
+    def __init__(self, mask):
+        self.mask = mask
+        self.width, self.height = mask.get_size()
+
+
+def hitbox(filename, scale=None, size=None):
+    """Cached Hitbox for a sprite at the given scale or size."""
+    key = (filename, scale, size)
+    box = _mask_cache.get(key)
+    if box is None:
+        box = Hitbox(pygame.mask.from_surface(load_sprite(filename, scale, size)))
+        _mask_cache[key] = box
+        while len(_mask_cache) > mask_cache_capacity:
+            _mask_cache.popitem(last=False)
+    else:
+        _mask_cache.move_to_end(key)
+    return box
+
+
+def mask_bytes(mask):
+    w, h = mask.get_size()
+    return (w + 7) // 8 * h
+
+
+def cache_usage():
+    """(masks cached, bytes of bits behind them)."""
+    boxes = list(_mask_cache.values())
+    return len(boxes), sum(mask_bytes(box.mask) for box in boxes)
+
+
+def collide(a, ax, ay, b, bx, by):
+    """True if Hitbox a at (ax, ay) overlaps Hitbox b at (bx, by)."""
+    dx = bx - ax
+    dy = by - ay
+    # Broad phase: bounding rects
+    if dx >= a.width or dy >= a.height or dx <= -b.width or dy <= -b.height:
+        return False
+    # Narrow phase: pixel masks
+    return a.mask.overlap(b.mask, (dx, dy)) is not None
@@ -0,0 +1,115 @@
+"""
+Game input: sampled once at the start of each frame, handed out once per simulation step.
+
+InputBuffer.pump() drains the event queue and reads the arrow keys together, before any
+simulation or drawing, and returns the other events for the caller to handle. step()
+gives the keys for one simulation step. A key pressed since the last step counts as held
+for that step even if it was already released again, so a tap shorter than a frame still
+moves the ship.
+
+LatencyProbe follows synthetic key presses (posted with a `sent` timestamp, see
+latency.py) through the frame: sampled by pump(), used by a simulation step, drawn, and
+presented on screen. Real key presses have no `sent` attribute and aren't measured.
+"""
+
+import threading
+import time
+import pygame
+
+STAGES = ("queued", "buffered", "drawing", "presenting")
+
+
+class InputBuffer:
+    def __init__(self, probe=None):
+        self.probe = probe
+        keys = pygame.key.get_pressed()
+        self.left, self.right = keys[pygame.K_LEFT], keys[pygame.K_RIGHT]
+        self.tapped_left = self.tapped_right = False
+        self.waiting = [] # probe records sampled but not yet used by a step
+
+    def pump(self):
+        """Sample the event queue and the arrow keys. Returns the events."""
+        events = pygame.event.get()
+        keys = pygame.key.get_pressed()
+        now = time.perf_counter()
+        self.left, self.right = keys[pygame.K_LEFT], keys[pygame.K_RIGHT]
+        for event in events:
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_LEFT:
+                self.tapped_left = True
+            elif event.key == pygame.K_RIGHT:
+                self.tapped_right = True
+            else:
+                continue
+            if self.probe:
+                record = self.probe.sampled(event, now)
+                if record is not None:
+                    self.waiting.append(record)
+        return events
+
+    def step(self):
+        """(left, right) for the next simulation step."""
+        left = self.left or self.tapped_left
+        right = self.right or self.tapped_right
+        self.tapped_left = self.tapped_right = False
+        if self.waiting:
+            self.probe.simulated(self.waiting)
+            self.waiting = []
+        return left, right
+
+
+class LatencyProbe:
+    """
+    Timestamps for each synthetic key press: sent, sampled, simulated, drawn and presented,
+    each with the number of frames presented so far.
+    """
+
+    def __init__(self):
+        self.frame = 0
+        self.lock = threading.Lock()
+        self.in_flight = [] # simulated, waiting to be drawn and presented
+        self.samples = []
+
+    def inject(self, key):
+        """Post a timestamped press and release of `key`; safe to call from any thread."""
+        with self.lock:
+            sent = (time.perf_counter(), self.frame)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, sent=sent))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, mod=0))
+
+    def sampled(self, event, now):
+        sent = getattr(event, "sent", None)
+        if sent is None:
+            return None
+        return [sent, (now, self.frame)]
+
+    def simulated(self, records):
+        now = (time.perf_counter(), self.frame)
+        for record in records:
+            record.append(now)
+        self.in_flight.extend(records)
+
+    def drawn(self):
+        now = (time.perf_counter(), self.frame)
+        for record in self.in_flight:
+            if len(record) == 3:
+                record.append(now)
+
+    def presented(self):
+        now = time.perf_counter()
+        with self.lock:
+            self.frame += 1
+            for record in self.in_flight:
+                record.append((now, self.frame))
+                self.samples.append(record)
+            self.in_flight = []
+
+    def stages(self):
+        """Per stage, the (ms, frames) each sample spent in it, plus the totals."""
+        result = {stage: [] for stage in STAGES + ("total",)}
+        for record in self.samples:
+            for stage, (start, end) in zip(STAGES, zip(record, record[1:])):
+                result[stage].append(((end[0] - start[0]) * 1000, end[1] - start[1]))
+            result["total"].append(((record[-1][0] - record[0][0]) * 1000, record[-1][1] - record[0][1]))
+        return result
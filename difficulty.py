@@ -0,0 +1,235 @@
+"""
+Progressive difficulty for Asteroid Alley.
+
+A Difficulty is a list of Levels, each reached at a score (or, with by="time", a number of
+steps). A level adds to the run's base asteroid speed and asteroid count from SimConfig and
+picks which spawn patterns its asteroids follow.
+
+Every level's spawns come from a SpawnSchedule: a stream of (lane, height) pairs generated
+a wave at a time from the run seed and the level number, so respawning an asteroid is a
+pop from a deque rather than fresh random math. Since a schedule depends only on the seed
+and the level, it can be generated and checked offline without playing the run:
+fairness_report() feeds each level's schedule through the same lane index the simulation
+uses and counts the moments a perfect player would have nowhere to go.
+
+Usage:
+    python difficulty.py [--seed 1] [--spawns 2000] [--ship images/spaceship.png]
+"""
+
+import argparse
+import random
+from collections import deque
+
+
+class Level:
+    """
+    Reached once the score (or step count) hits `start`. speed and asteroids are added to
+    SimConfig's asteroid_speed and num_asteroids.
+    """
+
+    def __init__(self, start, speed=0, asteroids=0, patterns=("scatter",)):
+        self.start = start
+        self.speed = speed
+        self.asteroids = asteroids
+        self.patterns = patterns
+
+
+DEFAULT_LEVELS = [
+    Level(0),
+    Level(100, asteroids=1),
+    Level(200, speed=1, asteroids=1, patterns=("scatter", "scatter", "pair")),
+    Level(300, speed=1, asteroids=2, patterns=("scatter", "pair", "stairs")),
+    Level(500, speed=2, asteroids=2, patterns=("scatter", "pair")),
+    Level(800, speed=2, asteroids=2, patterns=("pair", "stairs")),
+    Level(1200, speed=3, asteroids=2, patterns=("pair", "stairs")),
+]
+
+
+class Difficulty:
+    def __init__(self, levels=None, by="score"):
+        if by not in ("score", "time"):
+            raise ValueError(f"by must be 'score' or 'time', not {by!r}")
+        self.levels = levels or DEFAULT_LEVELS
+        self.by = by
+
+    @property
+    def max_extra_asteroids(self):
+        return max(level.asteroids for level in self.levels)
+
+    def next_start(self, index):
+        """Score or step at which the level after `index` starts, or None at the last level."""
+        return self.levels[index + 1].start if index + 1 < len(self.levels) else None
+
+    def schedule(self, seed, index, num_lanes, height):
+        return SpawnSchedule(seed, index, self.levels[index], num_lanes, height)
+
+
+FIXED = Difficulty([Level(0)]) # never ramps
+
+
+# Patterns: each returns a wave of (lane, height) spawns for a screen `screen_height` tall.
+# Heights are screen y at spawn time; the lane index still lifts a spawn to keep lanes
+# spaced and a row open.
+
+def scatter(rng, num_lanes, screen_height):
+    return [(rng.randrange(num_lanes), rng.randint(-screen_height, -50)) for _ in range(4)]
+
+
+def pair(rng, num_lanes, screen_height):
+    lane = rng.randrange(num_lanes - 1)
+    height = rng.randint(-screen_height, -50)
+    return [(lane, height), (lane + 1, height)]
+
+
+def stairs(rng, num_lanes, screen_height):
+    step = rng.choice((-1, 1))
+    lane = rng.randrange(num_lanes)
+    height = rng.randint(-screen_height // 2, -50)
+    wave = []
+    for i in range(3):
+        wave.append((lane, height - 80 * i))
+        lane = (lane + step) % num_lanes
+    return wave
+
+
+PATTERNS = {"scatter": scatter, "pair": pair, "stairs": stairs}
+
+
+class SpawnSchedule:
+    """The spawns for one level of one run, generated a wave at a time as they are used."""
+
+    def __init__(self, seed, index, level, num_lanes, screen_height):
+        # A string seed is hashed the same way in every process, unlike hash() of a tuple
+        self.rng = random.Random(f"{seed}/{index}")
+        self.level = level
+        self.num_lanes = num_lanes
+        self.screen_height = screen_height
+        self.queue = deque()
+
+    def pop(self):
+        """The next (lane, height) to spawn at."""
+        if not self.queue:
+            pattern = PATTERNS[self.rng.choice(self.level.patterns)]
+            self.queue.extend(pattern(self.rng, self.num_lanes, self.screen_height))
+        return self.queue.popleft()
+
+    def state(self):
+        return self.rng.getstate(), list(self.queue)
+
+    def restore(self, state):
+        rng_state, queue = state
+        self.rng.setstate(rng_state)
+        self.queue = deque(queue)
+
+
+def _dilate(intervals, distance, low, high):
+    """Grow each [a, b] interval by `distance`, clip to [low, high] and merge overlaps."""
+    grown = []
+    for a, b in intervals:
+        a, b = max(a - distance, low), min(b + distance, high)
+        if grown and a <= grown[-1][1] + 1:
+            grown[-1][1] = max(grown[-1][1], b)
+        else:
+            grown.append([a, b])
+    return grown
+
+
+def _subtract(intervals, blocked):
+    """Remove each blocked [a, b] interval from a sorted list of intervals."""
+    for c, d in blocked:
+        kept = []
+        for a, b in intervals:
+            if b < c or a > d:
+                kept.append([a, b])
+                continue
+            if a < c:
+                kept.append([a, c - 1])
+            if b > d:
+                kept.append([d + 1, b])
+        intervals = kept
+    return intervals
+
+
+def _overlap_rows(player, rock):
+    """
+    For each vertical offset dy of the rock relative to the player, the (min, max)
+    horizontal offset dx at which their masks overlap.
+    """
+    rows = {}
+    for dy in range(1 - rock.height, player.height):
+        for dx in range(1 - rock.width, player.width):
+            if player.mask.overlap(rock.mask, (dx, dy)):
+                low, high = rows.get(dy, (dx, dx))
+                rows[dy] = (min(low, dx), max(high, dx))
+    return rows
+
+
+def fairness_report(shapes, config=None, seed=0, spawns=2000):
+    """
+    Play each level's schedule with no player and report, per level: how far the lane index
+    had to lift spawns (a schedule that fights the spacing rules gets lifted a lot) and how
+    often a player moving at full speed with perfect foresight would be trapped. Collisions
+    use the pixel masks of the asteroid frame being shown, with any gap inside a row of a
+    mask treated as solid, so trap counts err slightly on the side of unfair.
+    """
+    from simulation import WIDTH, HEIGHT, TICK_RATE, SimConfig, Simulation # simulation imports this module
+    config = config or SimConfig()
+    player = shapes.player
+    frame_rows = [_overlap_rows(player, rock) for rock in shapes.asteroid_frames]
+    report = []
+    for index, level in enumerate(config.difficulty.levels):
+        sim = Simulation(shapes, config, seed)
+        sim.set_level(index)
+        span = WIDTH - player.width
+        reachable = [[0, span]]
+        lifts = []
+        traps = steps = 0
+        spawned = 0
+        while spawned < spawns:
+            steps += 1
+            sim.frame += 1
+            sim.lanes.advance(sim.asteroid_speed)
+            for entity in sim.asteroids:
+                entity.y += sim.asteroid_speed
+                if entity.y > HEIGHT:
+                    lifts.append(sim.respawn_asteroid(entity) - entity.y)
+                    spawned += 1
+
+            # Positions the ship could be in now, given where it could have been last step
+            reachable = _dilate(reachable, config.player_speed, 0, span)
+            rows = frame_rows[sim.asteroid_frame_index]
+            blocked = []
+            for entity in sim.asteroids:
+                dy = entity.y - sim.player_y
+                if dy in rows:
+                    blocked.append([entity.x - rows[dy][1], entity.x - rows[dy][0]])
+            blocked.sort()
+            reachable = _subtract(reachable, blocked)
+            if not reachable:
+                traps += 1
+                reachable = _subtract([[0, span]], blocked) or [[0, span]]
+
+        minutes = steps / TICK_RATE / 60
+        report.append({"level": index, "start": level.start, "speed": sim.asteroid_speed,
+                       "asteroids": len(sim.asteroids), "spawns": spawned,
+                       "mean_lift": round(sum(lifts) / len(lifts), 1), "max_lift": max(lifts),
+                       "traps_per_min": round(traps / minutes, 2)})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every difficulty level's spawn schedule for fairness.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawns", type=int, default=2000, help="spawns to play through per level")
+    parser.add_argument("--ship", default="images/spaceship.png")
+    args = parser.parse_args()
+
+    from simulation import load_shapes
+    print(f"{'level':>5} {'start':>6} {'speed':>5} {'rocks':>5} {'mean lift':>9} {'max lift':>8} {'traps/min':>9}")
+    for row in fairness_report(load_shapes(args.ship), seed=args.seed, spawns=args.spawns):
+        print(f"{row['level']:>5} {row['start']:>6} {row['speed']:>5} {row['asteroids']:>5} "
+              f"{row['mean_lift']:>9} {row['max_lift']:>8} {row['traps_per_min']:>9}")
+
+
+if __name__ == "__main__":
+    main()
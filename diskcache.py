@@ -0,0 +1,55 @@
+"""
+On-disk cache for data decoded from asset files, shared by the image, sound and font caches.
+
+Each entry is one file named after the source file plus a hash of its cache key. It starts
+with a header whose first field is the source file's mtime_ns, so editing the source makes
+the entry stale; the rest of the header is the caller's. Files are written to a temporary
+name and renamed into place, so a reader never sees half an entry. Every failure is
+treated as a miss: the cache is only an optimisation.
+"""
+
+import hashlib
+import os
+import struct
+
+
+def write_file(path, data):
+    """Replace the file at `path` with `data` (bytes), ignoring errors."""
+    try:
+        with open(path + ".tmp", "wb") as file:
+            file.write(data)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass
+
+
+class DiskCache:
+    def __init__(self, directory, suffix, header):
+        """`header` is a struct.Struct whose first field holds the source's mtime_ns."""
+        self.directory = directory
+        self.suffix = suffix
+        self.header = header
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, source, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{os.path.basename(source)}-{digest}{self.suffix}")
+
+    def read(self, source, key):
+        """(header fields after the mtime, payload), or None if missing or older than `source`."""
+        try:
+            with open(self.path(source, key), "rb") as file:
+                blob = file.read()
+            mtime, *fields = self.header.unpack_from(blob)
+            if mtime != os.stat(source).st_mtime_ns:
+                return None
+        except (OSError, struct.error):
+            return None
+        return tuple(fields), blob[self.header.size:]
+
+    def write(self, source, key, fields, payload):
+        try:
+            header = self.header.pack(os.stat(source).st_mtime_ns, *fields)
+        except OSError:
+            return
+        write_file(self.path(source, key), header + payload)
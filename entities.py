@@ -0,0 +1,61 @@
+"""
+Entity storage for the simulation.
+
+Asteroids, gems and shields are all Entity objects: a fixed set of attributes held in
+__slots__ (no per-object dict) for position, fall speed, kind and whether the entity is
+alive. The kind picks the entity's hitbox frames from Shapes, and the sprite frame shown
+comes from the simulation's shared animation clock.
+
+EntityPool hands entities out and takes them back through a free list, so an object that
+leaves the screen is reused by the next spawn instead of being reallocated.
+"""
+
+ASTEROID = 0
+GEM = 1
+SHIELD = 2
+
+
+class Entity:
+    __slots__ = ("kind", "x", "y", "speed", "alive")
+
+    def __init__(self):
+        self.kind = ASTEROID
+        self.x = 0
+        self.y = 0
+        self.speed = 0
+        self.alive = False
+
+    def state(self):
+        return (self.kind, self.x, self.y, self.speed)
+
+
+class EntityPool:
+    def __init__(self, capacity=0):
+        self.free = [Entity() for _ in range(capacity)]
+
+    def acquire(self, kind, x, y, speed):
+        entity = self.free.pop() if self.free else Entity()
+        entity.kind = kind
+        entity.x = x
+        entity.y = y
+        entity.speed = speed
+        entity.alive = True
+        return entity
+
+    def release(self, entity):
+        entity.alive = False
+        self.free.append(entity)
+
+    def remove(self, entities, i):
+        """Release entities[i] and drop it from the list by swapping in the last entry."""
+        entity = entities[i]
+        last = entities.pop()
+        if last is not entity:
+            entities[i] = last
+        self.release(entity)
+
+    def restore(self, entities, states):
+        """Make `entities` hold fresh entities for the (kind, x, y, speed) tuples in states."""
+        for entity in entities:
+            self.release(entity)
+        entities[:] = [self.acquire(*state) for state in states]
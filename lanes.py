@@ -0,0 +1,75 @@
+"""
+Lane-bucketed spatial index for asteroid spawning.
+
+Asteroids are snapped to fixed-width columns ("lanes") and all fall at the same speed, so
+their spacing within a lane never changes once they are placed. The index stores each
+asteroid as a lane plus a position along a track that scrolls with the asteroids
+(track = y - travel, where `travel` is the total distance fallen so far). Positions in a
+lane stay sorted without any per-frame bookkeeping.
+
+place() picks a spawn height in O(1) by putting the new asteroid at least `min_gap` above
+the highest one already in its lane, then makes sure the row it lands in still has at
+least one open lane: if every other lane has an asteroid within `clearance` of it, the
+spawn is lifted above them.
+"""
+
+from bisect import bisect_left, insort
+
+
+class LaneIndex:
+    def __init__(self, num_lanes, lane_width, min_gap=100, clearance=120):
+        self.num_lanes = num_lanes
+        self.lane_width = lane_width
+        self.min_gap = min_gap
+        self.clearance = clearance
+        self.travel = 0
+        self.lanes = [[] for _ in range(num_lanes)] # sorted track positions, highest first
+
+    def lane_of(self, x):
+        return x // self.lane_width
+
+    def advance(self, distance):
+        """Every asteroid moved down by `distance`."""
+        self.travel += distance
+
+    def top(self, lane):
+        """y of the highest asteroid in the lane, or None if it is empty."""
+        entries = self.lanes[lane]
+        return entries[0] + self.travel if entries else None
+
+    def place(self, x, y):
+        """
+        Register an asteroid spawning in the lane at x, no lower than y. Returns the y it
+        should actually spawn at.
+        """
+        lane = self.lane_of(x)
+        top = self.top(lane)
+        if top is not None:
+            y = min(y, top - self.min_gap)
+
+        # Keep at least one lane open across this row
+        for _ in range(len(self.lanes)):
+            blockers = [self.top_near(other, y) for other in range(self.num_lanes) if other != lane]
+            if any(b is None for b in blockers):
+                break
+            y = min(blockers) - self.clearance
+
+        insort(self.lanes[lane], y - self.travel)
+        return y
+
+    def top_near(self, lane, y):
+        """y of the highest asteroid in the lane within `clearance` of y, or None."""
+        entries = self.lanes[lane]
+        pos = y - self.travel
+        i = bisect_left(entries, pos - self.clearance)
+        if i < len(entries) and entries[i] < pos + self.clearance:
+            return entries[i] + self.travel
+        return None
+
+    def remove(self, x, y):
+        """Forget the asteroid at (x, y), e.g. when it leaves the screen or is destroyed."""
+        entries = self.lanes[self.lane_of(x)]
+        pos = y - self.travel
+        i = bisect_left(entries, pos)
+        if i < len(entries) and entries[i] == pos:
+            del entries[i]
@@ -0,0 +1,113 @@
+"""
+Input-to-photon latency measurement for Asteroid Alley.
+
+Plays seeded runs under SDL's dummy video and audio drivers while a background thread
+posts timestamped arrow-key taps at random moments, the way a player's presses land at
+arbitrary points in a frame. Each tap is followed through the game loop and the time and
+number of frames it spends in each stage is reported:
+
+- queued: posted until InputBuffer.pump() samples it at the start of a frame
+- buffered: sampled until a simulation step uses it
+- drawing: used by the simulation until the frame showing it has been drawn
+- presenting: drawn until the display flip or update returns
+
+Unlike benchmark.py the real frame limiter stays in place, since waiting for the next
+frame is part of the latency being measured. Runs happen in a scratch copy of the game
+directory, like the benchmark.
+
+Usage:
+    python latency.py [--taps 200] [--fps 60] [--json out.json]
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import random
+import shutil
+import threading
+import pygame
+from benchmark import make_workdir
+from controls import STAGES, LatencyProbe
+from profiler import percentile
+
+
+def inject_taps(probe, stop, seed):
+    rng = random.Random(seed)
+    while not stop.wait(rng.uniform(0.1, 0.3)):
+        probe.inject(rng.choice((pygame.K_LEFT, pygame.K_RIGHT)))
+        # Ignored during a run; dismisses the game-over screen between runs
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, mod=0))
+
+
+def summarize(stages):
+    summary = {}
+    for stage, values in stages.items():
+        ms = sorted(v[0] for v in values)
+        frames = [v[1] for v in values]
+        if not ms:
+            continue
+        summary[stage] = {
+            "mean_ms": round(sum(ms) / len(ms), 3),
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "mean_frames": round(sum(frames) / len(frames), 2),
+        }
+    return summary
+
+
+def measure(taps=200, fps=60, seed=1):
+    workdir = make_workdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    stop = threading.Event()
+    try:
+        import main_game
+        main_game.init_game()
+        main_game.frame_rate = fps
+        probe = LatencyProbe()
+        main_game.latency_probe = probe
+        injector = threading.Thread(target=inject_taps, args=(probe, stop, seed), daemon=True)
+        injector.start()
+        runs = 0
+        while len(probe.samples) < taps:
+            main_game.play_game(seed=seed + runs)
+            runs += 1
+        stop.set()
+        injector.join()
+        main_game.loader.done.wait()
+        main_game.save.close()
+        results = summarize(probe.stages())
+        results["taps"] = len(probe.samples)
+        results["runs"] = runs
+        return results
+    finally:
+        stop.set()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Asteroid Alley's input-to-photon latency.")
+    parser.add_argument("--taps", type=int, default=200, help="taps to measure")
+    parser.add_argument("--fps", type=int, default=60, help="in-game frame rate cap, as with main_game.py --fps")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    results = measure(args.taps, args.fps, args.seed)
+    print(f"{results['taps']} taps over {results['runs']} runs at --fps {args.fps}")
+    print(f"{'stage':<11}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'frames':>8}")
+    for stage in STAGES + ("total",):
+        if stage in results:
+            row = results[stage]
+            print(f"{stage:<11}{row['mean_ms']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['mean_frames']:>8}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
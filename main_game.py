@@ -8,480 +8,440 @@ and unlock ships from a shop menu using in-game currency.
 
 Dependencies:
 - pygame (see requirements.txt)
+- numpy (only needed for the batch simulator in batch_sim.py)
 
 Usage:
 - Run with: python main_game.py
 - Press enter to start (or click the start button)
 - Use arrow keys to move left and right
-- Navigate menus with mouse clicks
+- Navigate menus with mouse clicks; scroll the shop with the mouse wheel or the up/down keys
+- Press F3 in game to show frame timings; add --profile-out timings.csv to save them after each run
+- Run python benchmark.py to measure performance against a stored baseline
+- Run python latency.py to measure how long a key press takes to reach the screen
+- Run python -m pytest tests to check replays, lane spacing and save migration headlessly
+- Add --fps 120 or --fps 144 for high-refresh displays, or --fps 0 to render as fast as possible
+- Add --startup-report to print how long each startup stage took
+- Add --low-power to keep backgrounds still and redraw only what changes (for low-power hardware)
+- Add --memory-audit to print live surfaces, masks, sounds and cache sizes on entering each screen,
+  and --asset-cache-mb N to change how much image memory is kept outside the sprite atlas
+- Progress is kept in save-data.json, written in the background as it changes
+- Add --profile NAME to play as a profile in save-data.db instead (see profiles.py for leaderboards)
+- The last run is saved to replays/last-run.aarp (play it back with: python replay.py replays/last-run.aarp)
 """
 
+import argparse
+import os
 import pygame
-import random
 import sys
-import json
-import math
-
-pygame.init()
-pygame.mixer.init()
-
-width, height = 400, 600
-scorebox_width, scorebox_height = 155, 50
-screen = pygame.display.set_mode((width, height))
-pygame.display.set_caption("Asteroid Alley")
-title_font = pygame.font.SysFont("Impact", 50)
-menu_font = pygame.font.SysFont("Impact", 30)
-clock = pygame.time.Clock()
-
-# Start music
-pygame.mixer.music.load("audio/8bit-music.mp3")
-pygame.mixer.music.set_volume(0.5)
-pygame.mixer.music.play(-1)
-
-# Load SFX
-death_sound = pygame.mixer.Sound("audio/death-sound.mp3")
-level_up = pygame.mixer.Sound("audio/level-up.mp3")
-shield_sound = pygame.mixer.Sound("audio/shield-powerup.mp3")
-lose_shield = pygame.mixer.Sound("audio/8-bit-explosion.mp3")
-gem_sound = pygame.mixer.Sound("audio/coin.mp3")
-select_sound = pygame.mixer.Sound('audio/collect-item.mp3')
-fail_sound = pygame.mixer.Sound("audio/retro-hurt.mp3")
-gem_sound.set_volume(0.3)
-
-# COLORS
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-LIME = (100, 240, 40)
-SKY = (50, 170, 255)
+import time
+import collision
+import text
+from simulation import (WIDTH, HEIGHT, TICK_RATE, PLAYER_SCALE, ASTEROID_SCALE, GEM_SIZE, SHIELD_SIZE,
+                        ASTEROID_IMAGES, SHIELD_IMAGES, GEM_IMAGE, Simulation, load_shapes)
+from renderer import GameRenderer, DirtyRects, StaticLayer, BLACK, WHITE, RED, LIME
+from replay import Replay
+from assets import Assets
+from audio import AudioManager
+from profiler import FrameProfiler
+from savedata import SaveData
+from profiles import ProfileSave
+from startup import StartupTimer, BackgroundLoader
+from memaudit import MemoryAudit
+from shop import ShipIndex, ThumbnailStore, ShopGrid, SORTS, FILTERS
+from controls import InputBuffer
+
+width, height = WIDTH, HEIGHT
+
+# Set up by init_game() so that importing this module has no side effects
+screen = None
+title_font = None
+clock = None
+assets = None
+save = None # SaveData; save.data is the authoritative copy of the player's progress
+low_power = False # static backgrounds so only changed regions are redrawn
+profile_out = None # CSV/JSON path for per-frame timings, written when each run ends
+profile = None # profile name in save-data.db, or None to use save-data.json
+startup_report = False # print the startup timings once the menu is up
+frame_rate = 60 # render rate cap in the game; 0 = unlocked. The simulation always ticks at TICK_RATE
+lockstep = False # one simulation tick per rendered frame regardless of time, for the benchmark harness
+MAX_CATCH_UP = 5 # most ticks run in one frame after a stall; beyond that the game slows down instead
+audio = None # set up by the background loader
+startup = None # StartupTimer
+loader = None # BackgroundLoader for everything the first menu frame doesn't need
+memory = None # MemoryAudit when run with --memory-audit
+asset_cache_mb = 64 # budget for images outside the sprite atlas; least recently used go first
+SHOP_GRID_SIZE = 6 # ships in view in the shop at once; the rest are scrolled to
+catalog = None # ShipIndex over save.data["spaceships"], built by the background loader
+thumbnails = None # ThumbnailStore for the shop's ship previews
+latency_probe = None # controls.LatencyProbe while latency.py is measuring
+
+# Sound effects as (file, priority, volume); a higher priority can take a busy channel from a lower one
+SOUNDS = {
+    "death": ("audio/death-sound.mp3", 3, None),
+    "milestone": ("audio/level-up.mp3", 2, None),
+    "shield_lost": ("audio/8-bit-explosion.mp3", 2, None),
+    "shield": ("audio/shield-powerup.mp3", 1, None),
+    "gem": ("audio/coin.mp3", 1, 0.3),
+    "select": ("audio/collect-item.mp3", 0, None),
+    "buy": ("audio/buy-item.mp3", 0, None),
+    "fail": ("audio/retro-hurt.mp3", 0, None),
+}
+
+def init_game():
+    global screen, title_font, clock, assets, save, startup, loader, thumbnails
+    # Only what the first menu frame needs happens here; the rest loads behind the menu
+    startup = StartupTimer()
+    pygame.display.init()
+    pygame.font.init()
+    startup.mark("pygame init")
+
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption("Asteroid Alley")
+    clock = pygame.time.Clock()
+    startup.mark("display")
+
+    os.makedirs("cache", exist_ok=True)
+    text.use_font_cache("cache/fonts.json")
+    title_font = text.font("Impact", 50)
+    startup.mark("fonts")
+
+    if profile is None:
+        save = SaveData()
+    else:
+        save = ProfileSave(profile)
+    startup.mark("save data")
+
+    assets = Assets(cache_dir="cache/sprites", max_bytes=asset_cache_mb * 2**20)
+    if memory:
+        memory.track("assets", assets.usage)
+        memory.track("text", text.text_cache.usage)
+        memory.track("masks", collision.cache_usage)
+    assets.image('images/galaxy.png', scale=1.5, colorkey=False)
+    assets.image(GEM_IMAGE, size=(GEM_SIZE, GEM_SIZE))
+    thumbnails = ThumbnailStore(assets, scale=1.4)
+    if memory:
+        memory.track("thumbnails", thumbnails.usage)
+    startup.mark("menu assets")
+
+    loader = BackgroundLoader(startup)
+    loader.start([("audio", load_audio), ("sprites", load_assets)])
+
+def load_audio():
+    global audio
+    pygame.mixer.init()
+    manager = AudioManager(SOUNDS, cache_dir="cache/audio")
+    manager.play_music("audio/8bit-music.mp3", volume=0.5)
+    manager.preload()
+    if memory:
+        memory.track("sounds", manager.usage)
+    audio = manager
+
+def load_assets():
+    global catalog
+    # Game
+    assets.image('images/background.png', colorkey=False)
+    for filename in ASTEROID_IMAGES:
+        assets.image(filename, scale=ASTEROID_SCALE)
+    for filename in SHIELD_IMAGES:
+        assets.image(filename, size=(SHIELD_SIZE, SHIELD_SIZE))
+    assets.image("images/planet_stars.png", size=(width, height), colorkey=False)
+    # Shop: only the first ships it shows go in the atlas, so it doesn't grow with the catalog
+    catalog = ShipIndex(save.data["spaceships"])
+    for ship in save.data["spaceships"][:SHOP_GRID_SIZE]:
+        assets.image(ship["filename"], scale=PLAYER_SCALE)
+        assets.image(ship["filename"], scale=1.4)
+    assets.image("images/locked.png", scale=1.3)
+    assets.image('images/buy-ship-button.png', scale=3.2, alpha=True)
+    assets.pack_atlas()
+
+def audit_memory(screen_name):
+    if memory:
+        print(memory.report(memory.snapshot(screen_name)))
+
+def quit_game():
+    # Don't tear pygame down under the loader threads, and make sure the last changes reach the disk
+    loader.done.wait()
+    thumbnails.close()
+    save.close()
+    pygame.quit()
+    sys.exit()
 
 def main_menu():
+    global startup_report
     start_width, start_height = 140, 55
     start_button_rect = pygame.Rect(width // 2 - 70, 360, start_width, start_height)
     start_button_rect2 = pygame.Rect(width // 2 - 68, 362, start_width - 4, start_height - 4)
     shop_button_rect = pygame.Rect(width // 2 - 70, 430, start_width, start_height)
     shop_button_rect2 = pygame.Rect(width // 2 - 68, 432, start_width - 4, start_height - 4)
-    menu_font_selected = pygame.font.SysFont("Impact", 26)
-    galaxy = pygame.image.load('images/galaxy.png').convert()
-    galaxy = pygame.transform.scale(galaxy, (galaxy.get_width() * 1.5, galaxy.get_height() * 1.5))
-    gem_icon = pygame.image.load('images/gem.png').convert()
-    gem_icon.set_colorkey(BLACK)
-    gem_icon = pygame.transform.scale(gem_icon, (35, 35))
+    galaxy = assets.image('images/galaxy.png', scale=1.5, colorkey=False)
+    gem_icon = assets.image(GEM_IMAGE, size=(GEM_SIZE, GEM_SIZE))
     
     # menu text
     game_title = title_font.render("Asteroid Alley", True, LIME)
-    with open("save-data.json", "r") as file:
-        data = json.load(file)
-    gem_text = pygame.font.SysFont("Consolas", 25).render(str(data["gems"]), True, RED)
-    score_font = pygame.font.SysFont("Consolas", 25)
-    highscore_text = score_font.render(f"High score: {data["highscore"]}", True, LIME)
+    data = save.data
+    highscore_text = text.render("Consolas", 25, f"High score: {data['highscore']}", LIME)
     highscore_pos = highscore_text.get_rect(bottomright=(width - 30, height - 30))
-    base_size = highscore_text.get_size()
     font_amplitude = 0.07
     font_speed = 0.05
+    highscore_pulse = text.Pulse(highscore_text, font_amplitude, font_speed)
     frame = 0
+    audit_memory("menu")
+
+    # Static part of the menu, redrawn only when the gem count changes
+    def draw_background(surface, gems):
+        surface.fill(BLACK)
+        surface.blit(galaxy, (width // 2 - galaxy.get_width() // 2, height // 2 - galaxy.get_height() // 2))
+        surface.blit(game_title, (width // 2 - game_title.get_width() // 2, 110))
+        surface.blit(gem_icon, (10, 10))
+        surface.blit(text.render("Consolas", 25, str(gems), RED), (50, 18))
+    background = StaticLayer((width, height), draw_background)
+    background.update(data["gems"])
+    screen.blit(background.surface, (0, 0))
+    dirty = DirtyRects()
+    drawn = []
 
     while True:
         clock.tick(60)
-        screen.fill(BLACK)
-        mouse_pos = pygame.mouse.get_pos()
         click = False
-
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
                     return
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 click = True
+        mouse_pos = pygame.mouse.get_pos()
+
+        # Erase last frame's pulsing text and buttons
+        for rect in drawn:
+            screen.blit(background.surface, rect, rect)
+            dirty.mark(rect)
+        drawn = []
         
         # Pulse font size
-        scale_factor = 1 + font_amplitude * math.sin(frame * font_speed)
-        new_size = (int(base_size[0] * scale_factor), int(base_size[1] * scale_factor))
-        scaled_highscore = pygame.transform.smoothscale(highscore_text, new_size)
+        scaled_highscore = highscore_pulse.frame(frame)
         scaled_pos = scaled_highscore.get_rect(center=highscore_pos.center)
         frame += 1
 
-        screen.blit(galaxy, (width // 2 - galaxy.get_width() // 2, height // 2 - galaxy.get_height() // 2))
-        screen.blit(game_title, (width // 2 - game_title.get_width() // 2, 110))
-        screen.blit(scaled_highscore, scaled_pos)
-        screen.blit(gem_icon, (10, 10))
-        screen.blit(gem_text, (50, 18))
+        drawn.append(screen.blit(scaled_highscore, scaled_pos))
 
         # start button
+        drawn.append(start_button_rect)
         if start_button_rect.collidepoint(mouse_pos):
             pygame.draw.rect(screen, WHITE, start_button_rect)
             pygame.draw.rect(screen, BLACK, start_button_rect2)
-            button_text = menu_font_selected.render("Start", True, WHITE)
+            button_text = text.render("Impact", 26, "Start", WHITE)
             if click:
                 return # Start game when button is clicked
         else:
             pygame.draw.rect(screen, LIME, start_button_rect)
             pygame.draw.rect(screen, BLACK, start_button_rect2)
-            button_text = menu_font.render("Start", True, LIME)
+            button_text = text.render("Impact", 30, "Start", LIME)
         screen.blit(button_text, button_text.get_rect(center=start_button_rect.center))
 
         # Shop button
+        drawn.append(shop_button_rect)
         if shop_button_rect.collidepoint(mouse_pos):
             pygame.draw.rect(screen, WHITE, shop_button_rect)
             pygame.draw.rect(screen, BLACK, shop_button_rect2)
-            button_text = menu_font_selected.render("Shop", True, WHITE)
+            button_text = text.render("Impact", 26, "Shop", WHITE)
             if click:
-                select_sound.play()
-                pygame.mixer.music.set_volume(0.5)
+                loader.wait()
+                audio.play("select")
                 shop_screen() # Go to shop when button is clicked
                 # Update gem count when returning from shop
-                with open("save-data.json", "r") as file:
-                    data = json.load(file)
-                gem_text = pygame.font.SysFont("Consolas", 25).render(str(data["gems"]), True, RED)
+                background.update(data["gems"])
+                screen.blit(background.surface, (0, 0))
+                dirty.mark_all()
+                drawn = []
+                continue
         else:
             pygame.draw.rect(screen, LIME, shop_button_rect)
             pygame.draw.rect(screen, BLACK, shop_button_rect2)
-            button_text = menu_font.render("Shop", True, LIME)
+            button_text = text.render("Impact", 30, "Shop", LIME)
         screen.blit(button_text, button_text.get_rect(center=shop_button_rect.center))
-        
-        pygame.display.flip()
 
-def play_game():
-    level_up.play()
-    pygame.mixer.music.set_volume(0.5)
+        # This frame's text and buttons, which can reach past what was erased
+        for rect in drawn:
+            dirty.mark(rect)
+        dirty.present()
+        startup.frame_presented()
+        if startup_report and loader.ready():
+            print(startup.report())
+            startup_report = False
+
+def play_game(seed=None, max_frames=None):
+    # seed and max_frames pin a run down for replays and the benchmark harness
+    loader.wait()
+    audio.play("milestone")
     
-    # Load save data
-    with open("save-data.json", "r") as file:
-        data = json.load(file)
-    
-    # Background
-    bg = pygame.image.load('images/background.png').convert()
+    data = save.data
     
     # Player
-    for ship in data["spaceships"]:
-        if ship["selected"] == True:
-            player_image = ship["filename"]
-    player = pygame.image.load(player_image).convert()
-    player.set_colorkey(BLACK)
-    player = pygame.transform.scale(player,
-                                    (player.get_width() * 1.6, 
-                                    player.get_height() * 1.6))
-    player_x = width // 2 - player.get_width() // 2
-    player_y = 500
-    player_speed = 6
-    player_mask = pygame.mask.from_surface(player)
-
-    # Asteroids
-    asteroid_frames = [pygame.image.load("images/asteroid/asteroid1.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid2.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid3.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid4.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid5.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid6.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid7.png").convert(),
-                       pygame.image.load("images/asteroid/asteroid8.png").convert()]
-    asteroid_masks = []
-    for i in range(len(asteroid_frames)): # Rescale asteroid images
-        image = asteroid_frames[i]
-        image.set_colorkey(BLACK)
-        scaled_image = pygame.transform.scale(image, (image.get_width() * 0.6, image.get_height() * 0.6))
-        asteroid_frames[i] = scaled_image
-        asteroid_masks.append(pygame.mask.from_surface(asteroid_frames[i]))
-
-    asteroid_width = asteroid_frames[0].get_width()
-    asteroid_speed = 6
-    num_asteroids = 5
-    asteroids = [] # list of asteroid coords
-
-    # Initialize asteroid locations
-    for i in range(num_asteroids):
-        x = random.randint(0, width - asteroid_width)
-        snapped_x = (x // asteroid_width) * asteroid_width
-        y = random.randint(-(height), -50)
-        for other_coord in asteroids:
-            if snapped_x == other_coord['x'] and abs(y - other_coord['y']) < 100:
-                y -= 200
-        asteroids.append({'x': snapped_x, 'y': y})
-
-    # Gems and gem counter
-    gem = pygame.image.load('images/gem.png').convert()
-    gem.set_colorkey(BLACK)
-    gem = pygame.transform.scale(gem, (35, 35))
-    gem_mask = pygame.mask.from_surface(gem)
-    gem_text = pygame.font.SysFont("Consolas", 25).render(str(data["gems"]), True, RED)
-    gem_x = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width + 40
-    gem_y = -30
-    gem_speed = 4
-
-    # Shield powerups
-    shield_frames = [pygame.image.load('images/shield/shield1.png').convert(),
-                     pygame.image.load('images/shield/shield2.png').convert(),
-                     pygame.image.load('images/shield/shield3.png').convert(),
-                     pygame.image.load('images/shield/shield4.png').convert()]
-    shield_masks = []
-    for i in range(len(shield_frames)): # Rescale shield images
-        image = shield_frames[i]
-        image.set_colorkey(BLACK)
-        shield_width = 40
-        scaled_image = pygame.transform.scale(image, (shield_width, shield_width))
-        shield_frames[i] = scaled_image
-        shield_masks.append(pygame.mask.from_surface(shield_frames[i]))
-    shield_speed = 4
-    shield_x = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width + 30
-    shield_y = -70
-
-    # Background scrolling
-    scroll_speed = 1
-    bg_y1 = 0
-    bg_y2 = -height
-
-    # Initialize other variables
-    asteroid_frame_index = 0
-    shield_frame_index = 0
-    frame_delay1 = 10
-    frame_counter = 0
-    score = 0
-    score_box_color = LIME
-    flashing = False
+    player_image = data["spaceships"][catalog.selected]["filename"]
+
+    # World state is stepped by the simulation and drawn by the renderer
+    sim = Simulation(load_shapes(player_image), seed=seed)
+    replay = Replay(sim.seed, player_image)
+    dirty = DirtyRects()
+    profiler = FrameProfiler(keep_samples=profile_out is not None)
+    sim.profiler = profiler
+    renderer = GameRenderer(assets, player_image, dirty, scroll_speed=0 if low_power else 1, profiler=profiler)
     channel = None
-    milestone = 100
-    num_shields = 0
-    gem_time = pygame.time.get_ticks() + random.randint(10000, 15000) # 10-15 seconds
-    shield_time = pygame.time.get_ticks() + random.randint(40000, 70000) # 40-70 seconds
-    is_gem = False
-    is_shield = False
-    running = True
-
-    # Main game loop
-    while running: 
-        clock.tick(60)
-        screen.fill(BLACK)
-
-        # Move background
-        bg_y1 += scroll_speed
-        bg_y2 += scroll_speed
-        if bg_y1 > height:
-            bg_y1 = -height
-        if bg_y2 > height:
-            bg_y2 = -height
-        screen.blit(bg, (0, bg_y1))
-        screen.blit(bg, (0, bg_y2))
-
-        # Animations
-        frame_counter += 1
-        if frame_counter >= frame_delay1:
-            frame_counter = 0
-            asteroid_frame_index = (asteroid_frame_index + 1) % len(asteroid_frames)
-            shield_frame_index = (shield_frame_index + 1) % len(shield_frames)
-            if flashing:
-                score_box_color = WHITE if score_box_color == LIME else LIME
-
-        # Gems
-        now = pygame.time.get_ticks()
-        if now >= gem_time:
-            is_gem = True
-            gem_time = now + random.randint(10000, 20000)
-        if is_gem:
-            gem_y += gem_speed
-            screen.blit(gem, (gem_x, gem_y))
-            if gem_y > height:
-                gem_x = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width + 40
-                gem_y = -30
-                is_gem = False
-                gem_time = now + random.randint(10000, 20000)
-
-        # Shields
-        now = pygame.time.get_ticks()
-        if now >= shield_time:
-            is_shield = True
-            shield_time = now + random.randint(40000, 70000)
-        if is_shield:
-            shield_y += shield_speed
-            screen.blit(shield_frames[shield_frame_index], (shield_x, shield_y))
-            if shield_y > height:
-                shield_x = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width + 30
-                shield_y = -70
-                is_shield = False
-                shield_time = now + random.randint(40000, 70000)
-
-        # Player movement
-        key = pygame.key.get_pressed()
-        if key[pygame.K_LEFT] and player_x > 0:
-            player_x  -= player_speed
-        if key[pygame.K_RIGHT] and player_x + player.get_width() < width:
-            player_x += player_speed
-        screen.blit(player, (player_x, player_y))
-        
-        # Draw shield around player
-        if num_shields > 0:
-            circle_radius = 30
-            circle_color = (50, 170, 255, 64) # 64 means 25% transparency
-            circle_surface = pygame.Surface((circle_radius * 2, circle_radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(circle_surface, circle_color, (circle_radius, circle_radius), circle_radius)
-            player_pos = player.get_rect(topleft=(player_x, player_y))
-            circle_pos = (player_pos.centerx - circle_radius, player_pos.centery - circle_radius)
-            screen.blit(circle_surface, circle_pos)
-
-        # Check gem collision
-        gem_offset = (gem_x - player_x, gem_y - player_y)
-        if player_mask.overlap(gem_mask, gem_offset):
-            gem_sound.play()
-            pygame.mixer.music.set_volume(0.5)
-            data["gems"] += 1
-            gem_text = pygame.font.SysFont("Consolas", 25).render(str(data["gems"]), True, RED)
-            gem_x = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width + 40
-            gem_y = -30
-            is_gem = False
-
-        # Check shield collision
-        shield_offset = (shield_x - player_x, shield_y - player_y)
-        if player_mask.overlap(shield_masks[shield_frame_index], shield_offset):
-            shield_sound.play()
-            pygame.mixer.music.set_volume(0.5)
-            shield_x = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width + 30
-            shield_y = -70
-            is_shield = False
-            num_shields += 1
-        
-        # Asteroid movement
-        for coord, mask in zip(asteroids, asteroid_masks):
-            coord['y'] += asteroid_speed
-            if coord['y'] > height: # reset asteroid position
-                score += 1
-                coord['x'] = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width
-                coord['y'] = random.randint(-(height), -50)
-                # Adjust position if overlap occurs
-                for other_coord in asteroids:
-                    if coord is other_coord:
-                        continue
-                    if coord['x'] == other_coord['x'] and abs(coord['y'] - other_coord['y']) < 100:
-                        coord['y'] -= 200
-            screen.blit(asteroid_frames[asteroid_frame_index], (coord['x'], coord['y']))
-            # Check asteroid collision with player
-            asteroid_offset = (coord['x'] - player_x, coord['y'] - player_y)
-            if player_mask.overlap(mask, asteroid_offset):
-                if num_shields > 0:
-                    num_shields -= 1
-                    lose_shield.play()
-                    pygame.mixer.music.set_volume(0.5)
-                    coord['x'] = (random.randint(0, width - asteroid_width) // asteroid_width) * asteroid_width
-                    coord['y'] = random.randint(-(height), -50)
-                else:
-                    pygame.display.flip()
-                    death_sound.play()
-                    pygame.mixer.music.set_volume(0.5)
-                    running = False
-        
-        # Milestone reached
-        if score == milestone:
-            channel = level_up.play()
-            pygame.mixer.music.set_volume(0.5)
-            milestone += 100
-        if channel is not None and channel.get_busy():
-            flashing = True
-        else:
-            flashing = False
-            score_box_color = LIME
-        
-        # Score box
-        pygame.draw.rect(screen, score_box_color, (width - scorebox_width - 14, 10, scorebox_width, scorebox_height)) #border
-        pygame.draw.rect(screen, BLACK, (width - scorebox_width - 12, 12, scorebox_width - 4, scorebox_height - 4))
-        score_text = menu_font.render(f"Score: {score}", True, score_box_color)
-        screen.blit(score_text, (width - scorebox_width - 8, 18))
-
-        # Gem display
-        screen.blit(gem, (10, 10))
-        screen.blit(gem_text, (50, 18))
-
-        # Shield display
-        for i in range(num_shields):
-            pygame.draw.rect(screen, SKY, (15 + 30*i, height - 40, 15, 30))
-
-        for event in pygame.event.get():
+    inputs = InputBuffer(latency_probe)
+    audit_memory("game")
+
+    # Main game loop: the simulation runs in fixed ticks, owed time accumulates between
+    # frames, and each frame is drawn part way between the last two ticks
+    tick = 1 / TICK_RATE
+    owed = 0.0
+    last = time.perf_counter()
+    while sim.alive and (max_frames is None or sim.frame < max_frames):
+        clock.tick(frame_rate)
+        profiler.start_frame()
+
+        # Input is sampled before anything else happens in the frame
+        for event in inputs.pump():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-        
-        
-        pygame.display.flip()
+                quit_game()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+        profiler.mark("events")
+
+        now = time.perf_counter()
+        owed = tick if lockstep else min(owed + now - last, MAX_CATCH_UP * tick)
+        last = now
+        while owed >= tick and sim.alive and (max_frames is None or sim.frame < max_frames):
+            owed -= tick
+            left, right = inputs.step()
+            replay.record(left, right)
+            for name in sim.step(left, right):
+                played = audio.play(name)
+                if name == "milestone" and played is not None:
+                    channel = played
+            profiler.mark("audio")
+        flashing = channel is not None and channel.get_busy()
+        alpha = 1.0 if lockstep else owed / tick
+
+        renderer.draw(screen, sim, data["gems"] + sim.gems, flashing, alpha)
+        if latency_probe:
+            latency_probe.drawn()
+
+        dirty.present()
+        if latency_probe:
+            latency_probe.presented()
+        profiler.mark("flip")
+        profiler.end_frame()
+    score = sim.score
+    data["gems"] += sim.gems
+    replay.save("replays/last-run.aarp")
+    if profile_out:
+        profiler.export(profile_out)
 
     # Save game data
     if score > data["highscore"]:
         data["highscore"] = score
-    with open("save-data.json", "w") as file:
-        json.dump(data, file, indent=4)
+    save.record_run(score, sim.frame, sim.gems, player_image, sim.seed)
+    save.changed()
     
     # Game over screen
     waiting = True
-    subtitle_font = pygame.font.SysFont("Consolas", 18)
-    gameover_bg = pygame.image.load("images/planet_stars.png").convert()
-    big_font = pygame.font.SysFont("Impact", 35)
+    subtitle_font = text.font("Consolas", 18)
+    gameover_bg = assets.image("images/planet_stars.png", size=(width, height), colorkey=False)
+    big_font = text.font("Impact", 35)
     
-    while waiting:
-        gameover_bg = pygame.transform.scale(gameover_bg, (width, height))
-        screen.blit(gameover_bg, (0,0))
-        game_over = big_font.render("Game over!", True, LIME)
-        score_result = big_font.render("Score: " + str(score), True, LIME)
-        game_over2 = subtitle_font.render("Press 'Enter' to return to menu", True, LIME)
-        screen.blit(game_over, (width // 2 - game_over.get_width() // 2, 100))
-        screen.blit(score_result, (width // 2 - score_result.get_width() // 2, 180))
-        screen.blit(game_over2, (width // 2 - game_over2.get_width() // 2, 250))
-        pygame.display.flip()
+    # Nothing on this screen changes, so draw it once and just wait for input
+    screen.blit(gameover_bg, (0,0))
+    game_over = big_font.render("Game over!", True, LIME)
+    score_result = big_font.render("Score: " + str(score), True, LIME)
+    game_over2 = subtitle_font.render("Press 'Enter' to return to menu", True, LIME)
+    screen.blit(game_over, (width // 2 - game_over.get_width() // 2, 100))
+    screen.blit(score_result, (width // 2 - score_result.get_width() // 2, 180))
+    screen.blit(game_over2, (width // 2 - game_over2.get_width() // 2, 250))
+    pygame.display.flip()
+    audit_memory("game over")
 
+    while waiting:
+        clock.tick(30)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
                     waiting = False
 
 def shop_screen():
-    bg = pygame.image.load('images/background.png').convert()
-    gem_icon = pygame.image.load('images/gem.png').convert()
-    gem_icon.set_colorkey(BLACK)
-    gem_icon = pygame.transform.scale(gem_icon, (35, 35))
-    shop_font = pygame.font.SysFont("Impact", 25)
-    shop_font_selected = pygame.font.SysFont("Impact", 22)
+    loader.wait()
+    bg = assets.image('images/background.png', colorkey=False)
+    gem_icon = assets.image(GEM_IMAGE, size=(GEM_SIZE, GEM_SIZE))
     back_width, back_height = 85, 50
     back_button_rect = pygame.Rect(10, 10, back_width, back_height)
     back_button_rect2 = pygame.Rect(12, 12, back_width - 4, back_height - 4)
-    buy_sound = pygame.mixer.Sound('audio/buy-item.mp3')
-    with open("save-data.json", "r") as file:
-        data = json.load(file)
-    
-    # Load ship images
-    ship_images = []
-    for ship in data["spaceships"]:
-        tmp_image = pygame.image.load(ship["filename"]).convert()
-        tmp_image.set_colorkey(BLACK)
-        tmp_image = pygame.transform.scale(tmp_image,
-                                    (tmp_image.get_width() * 1.4, 
-                                    tmp_image.get_height() * 1.4))
-        ship_images.append(tmp_image)
-    # Load images for locked ships
-    lock_image = pygame.image.load("images/locked.png").convert()
-    lock_image.set_colorkey(BLACK)
-    lock_image = pygame.transform.scale(lock_image, (lock_image.get_width() * 1.3, lock_image.get_height() * 1.3))
-    buy_button_image = pygame.image.load('images/buy-ship-button.png').convert_alpha()
-    buy_button_image = pygame.transform.scale(buy_button_image, (buy_button_image.get_width() * 3.2, buy_button_image.get_height() * 3.2))
+    sort_rect = pygame.Rect(width - 130, 12, 120, 22)
+    show_rect = pygame.Rect(width - 130, 38, 120, 22)
+    data = save.data
+    ships = data["spaceships"]
+
+    # Images for locked ships and the buy button
+    lock_image = assets.image("images/locked.png", scale=1.3)
+    buy_button_image = assets.image('images/buy-ship-button.png', scale=3.2, alpha=True)
     buy_button_rect = buy_button_image.get_rect(topleft=(width // 2 - buy_button_image.get_width() // 2, 500))
 
-    # Find selected ship
-    for i, ship in enumerate(data["spaceships"]):
-        if ship["selected"] == True:
-            ship_selected_index = i
-    ship_looking_index = ship_selected_index
+    # Only the rows of the grid in view are laid out, loaded and drawn
+    grid = ShopGrid(65, 220, columns=3, rows=SHOP_GRID_SIZE // 3)
+    sort, show = "catalog", "all"
+    listing = catalog.view(sort, show)
+    ship_looking_index = catalog.selected
+    grid.scroll_to(listing.index(ship_looking_index), len(listing))
+    audit_memory("shop")
 
     # Background scrolling
-    scroll_speed = 1
+    scroll_speed = 0 if low_power else 1
     bg_x1 = 0
     bg_x2 = -width
+    last_inputs = None
     
     while True:
         clock.tick(60)
-        screen.fill(BLACK)
-        mouse_pos = pygame.mouse.get_pos()
         click = False
-        gem_text = pygame.font.SysFont("Consolas", 25).render(str(data["gems"]), True, RED)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_game()
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                click = True
+            if event.type == pygame.MOUSEWHEEL:
+                grid.scroll_by(-event.y, len(listing))
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_UP, pygame.K_DOWN):
+                grid.scroll_by(1 if event.key == pygame.K_DOWN else -1, len(listing))
+        mouse_pos = pygame.mouse.get_pos()
+
+        # Sorting and filtering
+        if click and sort_rect.collidepoint(mouse_pos):
+            sort = SORTS[(SORTS.index(sort) + 1) % len(SORTS)]
+        elif click and show_rect.collidepoint(mouse_pos):
+            show = FILTERS[(FILTERS.index(show) + 1) % len(FILTERS)]
+            grid.scroll = 0
+        listing = catalog.view(sort, show)
+        grid.scroll_by(0, len(listing)) # clamp after the listing shrank
+
+        cells = grid.visible(len(listing))
+        wanted = [ships[listing[slot]]["filename"] for slot, _ in cells]
+        wanted += [ships[listing[slot]]["filename"] for slot in grid.prefetch(len(listing))]
+        for filename in wanted:
+            thumbnails.request(filename)
+
+        # A static background only needs redrawing when something on screen can change
+        inputs = (mouse_pos, catalog.selected, ship_looking_index, data["gems"], sort, show,
+                  grid.scroll, len(thumbnails.ready))
+        if not scroll_speed and not click and inputs == last_inputs:
+            continue
+        if last_inputs is None or grid.scroll != last_inputs[6]:
+            thumbnails.forget(set(wanted))
+        last_inputs = inputs
+
+        screen.fill(BLACK)
+        gem_text = text.render("Consolas", 25, str(data["gems"]), RED)
         
         # Move background
         bg_x1 += scroll_speed
@@ -495,106 +455,116 @@ def shop_screen():
 
         screen.blit(gem_icon, (110, 18))
         screen.blit(gem_text, (150, 26))
+        for label, rect in ((f"Sort: {sort}", sort_rect), (f"Show: {show}", show_rect)):
+            color = WHITE if rect.collidepoint(mouse_pos) else LIME
+            screen.blit(text.render("Consolas", 18, label, color), rect)
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                click = True
-        
-        # Draw ships on grid
-        start_x, start_y = 65, 220
-        gap = 100
+        # Draw the ships in view
         buy_button_y = 500
-        for i, ship in enumerate(data["spaceships"][:6]):
-            box_size = 70
-            col = i % 3
-            row = i // 3
-            x = start_x + gap * col
-            y = start_y + gap * row
-            if i == ship_selected_index:
-                x -= 3
-                y -= 3
-                box_size += 6
-            if i == ship_looking_index:
-                ship_text = pygame.font.SysFont("Consolas", 22).render(str(ship["name"]), True, LIME)
-            rect = pygame.Rect(x, y, box_size, box_size)
+        for slot, rect in cells:
+            i = listing[slot]
+            ship = ships[i]
+            if i == catalog.selected:
+                rect.inflate_ip(6, 6)
             # Detect mouse selections
             if rect.collidepoint(mouse_pos) or i == ship_looking_index:
                 pygame.draw.rect(screen, WHITE, rect)
-                if click and ship["unlocked"] == True: # change selected ship
-                    data["spaceships"][ship_selected_index]["selected"] = False
-                    data["spaceships"][i]["selected"] = True
-                    ship_selected_index = i
-                    ship_looking_index = i
-                elif click:
+                if click and rect.collidepoint(mouse_pos):
+                    if ship["unlocked"] == True: # change selected ship
+                        catalog.select(i)
+                        save.changed()
                     ship_looking_index = i
+                    audio.play("select")
             else:
                 pygame.draw.rect(screen, LIME, rect)
-            if i == ship_selected_index:
-                pygame.draw.rect(screen, BLACK, (x + 6, y + 6, box_size - 12, box_size - 12))
-            else:
-                pygame.draw.rect(screen, BLACK, (x + 3, y + 3, box_size - 6, box_size - 6))
-            image_rect = ship_images[i].get_rect(center=rect.center)
-            screen.blit(ship_images[i], image_rect)
-
-            # Display images for locked ships
-            if ship["unlocked"] == False:
-                screen.blit(lock_image, image_rect)
-            if i == ship_looking_index and ship["unlocked"] == False:
-                if buy_button_rect.collidepoint(mouse_pos):
-                    buy_button_y += 2
-                    screen.blit(buy_button_image, (width // 2 - buy_button_image.get_width() // 2, buy_button_y))
-                    buy_text = pygame.font.SysFont("Consolas", 24).render("Buy", True, RED)
-                    # Buying the ship
-                    if click and data["gems"] >= ship["cost"]:
-                        buy_sound.play()
-                        pygame.mixer.music.set_volume(0.5)
-                        data["gems"] -= ship["cost"]
-                        data["spaceships"][i]["unlocked"] = True
-                        data["spaceships"][i]["selected"] = True
-                        ship_selected_index = i
-                    elif click:
-                        fail_sound.play()
-                        pygame.mixer.music.set_volume(0.5)
-                else:
-                    screen.blit(buy_button_image, buy_button_rect)
-                    buy_text = pygame.font.SysFont("Consolas", 24).render("Buy", True, BLACK)
-                screen.blit(buy_text, (140, buy_button_y + 8))
-                screen.blit(gem_icon, (180, buy_button_y))
-                cost_text = pygame.font.SysFont("Consolas", 24).render(str(ship["cost"]), True, RED)
-                screen.blit(cost_text, (215, buy_button_y + 8))
-
-            # Play sounds
-            if rect.collidepoint(mouse_pos) and click:
-                select_sound.play()
-                pygame.mixer.music.set_volume(0.5)
-
-
+            border = 6 if i == catalog.selected else 3
+            pygame.draw.rect(screen, BLACK, rect.inflate(-2 * border, -2 * border))
+            image = thumbnails.get(ship["filename"])
+            if image is not None:
+                image_rect = image.get_rect(center=rect.center)
+                screen.blit(image, image_rect)
+                # Display images for locked ships
+                if ship["unlocked"] == False:
+                    screen.blit(lock_image, image_rect)
+
+        # Scroll bar, when there is more than fits
+        total_rows = grid.total_rows(len(listing))
+        if total_rows > grid.rows:
+            track = pygame.Rect(width - 22, grid.rect.top, 6, grid.rect.height)
+            thumb_height = max(12, track.height * grid.rows // total_rows)
+            thumb_top = track.top + (track.height - thumb_height) * grid.scroll // (total_rows - grid.rows)
+            pygame.draw.rect(screen, BLACK, track)
+            pygame.draw.rect(screen, LIME, (track.left, thumb_top, track.width, thumb_height))
+
+        # Ship being looked at: its name, and a buy button if it's locked
+        ship = ships[ship_looking_index]
+        ship_text = text.render("Consolas", 22, str(ship["name"]), LIME)
         screen.blit(ship_text, (width // 2 - ship_text.get_width() // 2, 455))
+        if ship["unlocked"] == False:
+            if buy_button_rect.collidepoint(mouse_pos):
+                buy_button_y += 2
+                screen.blit(buy_button_image, (width // 2 - buy_button_image.get_width() // 2, buy_button_y))
+                buy_text = text.render("Consolas", 24, "Buy", RED)
+                # Buying the ship
+                if click and data["gems"] >= ship["cost"]:
+                    audio.play("buy")
+                    data["gems"] -= ship["cost"]
+                    catalog.unlock(ship_looking_index)
+                    catalog.select(ship_looking_index)
+                    save.changed()
+                elif click:
+                    audio.play("fail")
+            else:
+                screen.blit(buy_button_image, buy_button_rect)
+                buy_text = text.render("Consolas", 24, "Buy", BLACK)
+            screen.blit(buy_text, (140, buy_button_y + 8))
+            screen.blit(gem_icon, (180, buy_button_y))
+            cost_text = text.render("Consolas", 24, str(ship["cost"]), RED)
+            screen.blit(cost_text, (215, buy_button_y + 8))
 
         # Back button
         if back_button_rect.collidepoint(mouse_pos):
             pygame.draw.rect(screen, WHITE, back_button_rect)
             pygame.draw.rect(screen, BLACK, back_button_rect2)
-            button_text = shop_font_selected.render("Back", True, WHITE)
+            button_text = text.render("Impact", 22, "Back", WHITE)
             if click:
-                select_sound.play()
-                pygame.mixer.music.set_volume(0.5)
-                # Write save data back to file
-                with open("save-data.json", "w") as file:
-                    json.dump(data, file, indent=4)
+                audio.play("select")
                 return # Return to main menu
         else:
             pygame.draw.rect(screen, LIME, back_button_rect)
             pygame.draw.rect(screen, BLACK, back_button_rect2)
-            button_text = shop_font.render("Back", True, LIME)
+            button_text = text.render("Impact", 25, "Back", LIME)
         screen.blit(button_text, button_text.get_rect(center=back_button_rect.center))
 
         pygame.display.flip()
 
 # Run the game
-while True:
-    main_menu()
-    play_game()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asteroid Alley")
+    parser.add_argument("--low-power", action="store_true",
+                        help="keep backgrounds still and only redraw the parts of the screen that change")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="write per-frame phase timings to PATH (.csv or .json) after each run")
+    parser.add_argument("--profile", metavar="NAME",
+                        help="play as this profile in save-data.db (created empty on first use)")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="frame rate cap in game, e.g. 120 or 144 for high-refresh displays; 0 for unlocked")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup stage took")
+    parser.add_argument("--memory-audit", action="store_true",
+                        help="print memory use on entering each screen (slow: scans the whole heap)")
+    parser.add_argument("--asset-cache-mb", type=int, default=64,
+                        help="MB of images kept outside the sprite atlas before the least recently used are dropped")
+    args = parser.parse_args()
+    low_power = args.low_power
+    profile_out = args.profile_out
+    profile = args.profile
+    startup_report = args.startup_report
+    frame_rate = args.fps
+    asset_cache_mb = args.asset_cache_mb
+    if args.memory_audit:
+        memory = MemoryAudit()
+    init_game()
+    while True:
+        main_menu()
+        play_game()
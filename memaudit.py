@@ -0,0 +1,100 @@
+"""
+Memory audit mode.
+
+MemoryAudit.snapshot(screen) is called whenever a screen is entered and records:
+- Python allocations traced by tracemalloc: live now, and the peak since the last snapshot
+- every live pygame Surface, Mask and Sound reachable from Python objects, with the bytes
+  behind them (subsurfaces share their parent's pixels and aren't counted twice)
+- the entries and bytes held by each cache registered with track()
+- the process's max RSS, where the resource module exists
+
+Scanning for live objects walks the whole heap, so this is for diagnosing leaks and
+checking memory ceilings, not for normal play.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+import pygame
+from assets import surface_bytes
+from audio import sound_bytes
+from collision import mask_bytes
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+MB = 1024 * 1024
+CONTAINERS = (dict, list, tuple)
+
+
+def live_objects():
+    """
+    Surfaces, masks and sounds referenced from anywhere in the Python heap. pygame's types
+    aren't tracked by the garbage collector themselves, so look one reference deep from
+    everything that is. Neither is a dict or tuple holding only untracked objects (such as
+    AudioManager.sounds), so look inside the containers found on the way too.
+    """
+    found = {pygame.Surface: {}, pygame.mask.Mask: {}, pygame.mixer.Sound: {}}
+
+    def visit(ref):
+        bucket = found.get(type(ref))
+        if bucket is not None:
+            bucket[id(ref)] = ref
+
+    for obj in gc.get_objects():
+        for ref in gc.get_referents(obj):
+            if type(ref) in CONTAINERS and not gc.is_tracked(ref):
+                for item in (ref.values() if type(ref) is dict else ref):
+                    visit(item)
+            else:
+                visit(ref)
+    return ([s for s in found[pygame.Surface].values() if s.get_parent() is None],
+            list(found[pygame.mask.Mask].values()), list(found[pygame.mixer.Sound].values()))
+
+
+class MemoryAudit:
+    def __init__(self, frames=1):
+        self.caches = {} # name -> function returning (entries, bytes)
+        self.snapshots = []
+        tracemalloc.start(frames)
+
+    def track(self, name, usage):
+        """Report `usage()`, which returns (entries, bytes), with every snapshot."""
+        self.caches[name] = usage
+
+    def snapshot(self, screen):
+        start = time.perf_counter()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        surfaces, masks, sounds = live_objects()
+        entry = {
+            "screen": screen,
+            "python_bytes": current,
+            "python_peak_bytes": peak,
+            "surfaces": len(surfaces), "surface_bytes": sum(surface_bytes(s) for s in surfaces),
+            "masks": len(masks), "mask_bytes": sum(mask_bytes(m) for m in masks),
+            "sounds": len(sounds), "sound_bytes": sum(sound_bytes(s) for s in sounds),
+            # list(): the background loader registers caches while the menu is up
+            "caches": {name: usage() for name, usage in list(self.caches.items())},
+        }
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            entry["max_rss_mb"] = round(rss / (MB if sys.platform == "darwin" else 1024), 1)
+        entry["scan_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self.snapshots.append(entry)
+        return entry
+
+    def report(self, entry):
+        lines = [f"Memory entering {entry['screen']} (scan took {entry['scan_ms']} ms):",
+                 f"  python    {entry['python_bytes'] / MB:8.2f} MB  (peak {entry['python_peak_bytes'] / MB:.2f} MB)"]
+        for kind in ("surfaces", "masks", "sounds"):
+            size = entry[kind[:-1] + "_bytes"]
+            lines.append(f"  {kind:<9} {size / MB:8.2f} MB  in {entry[kind]}")
+        for name, (entries, size) in entry["caches"].items():
+            lines.append(f"  {name + ' cache':<9} {size / MB:8.2f} MB  in {entries}")
+        if "max_rss_mb" in entry:
+            lines.append(f"  max RSS   {entry['max_rss_mb']:8.2f} MB")
+        return "\n".join(lines)
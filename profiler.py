@@ -0,0 +1,113 @@
+"""
+Frame-time profiler.
+
+Each frame is split into named phases: call start_frame(), then mark(phase) as each phase
+finishes, then end_frame(). The time since the previous mark is charged to that phase.
+Rolling p50/p95/p99 are kept over the last `window` frames and can be drawn as an
+on-screen overlay. With keep_samples=True every frame's samples are also kept for the run
+so they can be exported to CSV or JSON when it ends; otherwise memory use stays flat however
+long the run.
+"""
+
+import csv
+import json
+import time
+from collections import deque
+import pygame
+import text
+
+WHITE = (255, 255, 255)
+LIME = (100, 240, 40)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class FrameProfiler:
+    def __init__(self, window=600, overlay_every=30, keep_samples=False):
+        self.window = window
+        self.overlay_every = overlay_every
+        self.phases = [] # in first-seen order
+        self.frames = 0
+        self.samples = [] if keep_samples else None # one {phase: ms} dict per frame, plus "total"
+        self.recent = deque(maxlen=window)
+        self.current = None
+        self.last = 0.0
+        self.frame_start = 0.0
+        self.overlay = None
+        self.overlay_visible = False
+
+    def start_frame(self):
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last) * 1000
+        self.last = now
+        if phase not in self.phases:
+            self.phases.append(phase)
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        self.current["total"] = (time.perf_counter() - self.frame_start) * 1000
+        if self.samples is not None:
+            self.samples.append(self.current)
+        self.recent.append(self.current)
+        self.current = None
+        self.frames += 1
+        if self.overlay_visible and self.frames % self.overlay_every == 0:
+            self.overlay = None
+
+    def stats(self, frames=None):
+        """{phase: (p50, p95, p99)} in milliseconds over `frames` (default: the rolling window)."""
+        frames = self.recent if frames is None else frames
+        result = {}
+        for phase in self.phases + ["total"]:
+            values = sorted(frame.get(phase, 0.0) for frame in frames)
+            result[phase] = (percentile(values, 50), percentile(values, 95), percentile(values, 99))
+        return result
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.overlay = None
+
+    def draw_overlay(self, screen, pos=(10, 70)):
+        """Draw the percentile table if the overlay is on; returns the rect drawn, if any."""
+        if not self.overlay_visible:
+            return None
+        if self.overlay is None:
+            font = text.font("Consolas", 14)
+            lines = [f"{'phase':<11}{'p50':>6}{'p95':>6}{'p99':>6}"]
+            for phase, (p50, p95, p99) in self.stats().items():
+                lines.append(f"{phase:<11}{p50:6.2f}{p95:6.2f}{p99:6.2f}")
+            line_height = font.get_linesize()
+            width = max(font.size(line)[0] for line in lines) + 8
+            self.overlay = pygame.Surface((width, line_height * len(lines) + 8), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 180))
+            for i, line in enumerate(lines):
+                color = LIME if i else WHITE
+                self.overlay.blit(font.render(line, True, color), (4, 4 + i * line_height))
+        return screen.blit(self.overlay, pos)
+
+    def export(self, path):
+        """Write every frame's samples to `path` as JSON (.json) or CSV (anything else)."""
+        if self.samples is None:
+            raise ValueError("export() needs a FrameProfiler made with keep_samples=True")
+        columns = self.phases + ["total"]
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"phases": columns, "summary": self.stats(self.samples), "frames": self.samples}, file)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["frame"] + columns)
+                for i, frame in enumerate(self.samples):
+                    writer.writerow([i] + [f"{frame.get(phase, 0.0):.4f}" for phase in columns])
@@ -0,0 +1,247 @@
+"""
+Multi-profile save store backed by SQLite.
+
+One database holds any number of player profiles, the ships each profile has unlocked and
+every run they have played (score, length in frames, gems, ship and seed). Runs are
+indexed by score, overall and per profile, so top-N leaderboards stay a short index scan
+no matter how many runs have been recorded.
+
+ProfileSave adapts one profile to the SaveData interface (`data`, changed(), flush(),
+close(), record_run()), so the game can run on either store. Like SaveData it saves on a
+background thread, so a change costs the frame nothing. New profiles start with nothing
+unlocked; an existing save-data.json file can be imported as a new profile instead.
+
+Usage:
+    python profiles.py import save-data.json --name Justin
+    python profiles.py leaderboard [--profile Justin] [-n 10]
+    python main_game.py --profile Justin
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from savedata import BackgroundWriter, migrate
+from simulation import TICK_RATE
+
+DB_PATH = "save-data.db"
+SCHEMA_VERSION = 1
+
+
+def _signed(seed):
+    # Seeds are unsigned 64-bit but SQLite integers are signed
+    return seed - 2**64 if seed >= 2**63 else seed
+
+
+def _unsigned(seed):
+    return seed & (2**64 - 1)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    highscore INTEGER NOT NULL DEFAULT 0,
+    gems INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ships (
+    profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    filename TEXT NOT NULL,
+    name TEXT NOT NULL,
+    cost INTEGER NOT NULL,
+    position INTEGER NOT NULL, -- order in the shop
+    unlocked INTEGER NOT NULL,
+    selected INTEGER NOT NULL,
+    PRIMARY KEY (profile_id, filename)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    score INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    gems INTEGER NOT NULL,
+    ship TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    played REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_profile_score ON runs (profile_id, score DESC);
+CREATE INDEX IF NOT EXISTS profiles_by_highscore ON profiles (highscore DESC);
+"""
+
+
+class ProfileStore:
+    def __init__(self, path=DB_PATH, check_same_thread=True):
+        self.db = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL") # WAL keeps this crash-safe
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{path} has schema version {version}, newer than this game supports")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    # Profiles
+
+    def create_profile(self, name, data=None):
+        """Add a profile, optionally starting from save-data.json style `data`. Returns its id."""
+        data = migrate(data if data is not None else {"highscore": 0, "gems": 0, "spaceships": []})
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO profiles (name, highscore, gems, created) VALUES (?, ?, ?, ?)",
+                (name, data["highscore"], data["gems"], time.time()))
+            profile_id = cursor.lastrowid
+            self._write_ships(profile_id, data["spaceships"])
+        return profile_id
+
+    def import_json(self, path, name):
+        with open(path, "r") as file:
+            return self.create_profile(name, json.load(file))
+
+    def profile_id(self, name):
+        row = self.db.execute("SELECT id FROM profiles WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def profiles(self):
+        """[(id, name, highscore, gems)] in name order."""
+        return self.db.execute("SELECT id, name, highscore, gems FROM profiles ORDER BY name").fetchall()
+
+    def load(self, profile_id):
+        """
+        The profile as a save-data.json style dict: its stored ships in shop order, topped up
+        with any catalog ships it doesn't have yet.
+        """
+        rows = self.db.execute(
+            "SELECT p.highscore, p.gems, s.name, s.filename, s.cost, s.unlocked, s.selected "
+            "FROM profiles p LEFT JOIN ships s ON s.profile_id = p.id WHERE p.id = ? "
+            "ORDER BY s.position, s.filename",
+            (profile_id,)).fetchall()
+        if not rows:
+            raise KeyError(f"no profile with id {profile_id}")
+        ships = [{"name": name, "filename": filename, "unlocked": bool(unlocked),
+                  "selected": bool(selected), "cost": cost}
+                 for _, _, name, filename, cost, unlocked, selected in rows if filename is not None]
+        return migrate({"highscore": rows[0][0], "gems": rows[0][1], "spaceships": ships})
+
+    def save(self, profile_id, data):
+        with self.db:
+            # record_run() may have raised the high score since `data` was taken
+            self.db.execute("UPDATE profiles SET highscore = MAX(highscore, ?), gems = ? WHERE id = ?",
+                            (data["highscore"], data["gems"], profile_id))
+            self._write_ships(profile_id, data["spaceships"])
+
+    def _write_ships(self, profile_id, ships):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO ships (profile_id, filename, name, cost, position, unlocked, selected) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(profile_id, ship["filename"], ship["name"], ship["cost"], i, int(ship["unlocked"]),
+              int(ship["selected"])) for i, ship in enumerate(ships)])
+
+    # Runs and leaderboards
+
+    def record_run(self, profile_id, score, frames, gems, ship, seed):
+        """Store a finished run and raise the profile's high score if it beat it."""
+        with self.db:
+            self.db.execute(
+                "INSERT INTO runs (profile_id, score, frames, gems, ship, seed, played) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (profile_id, score, frames, gems, ship, _signed(seed), time.time()))
+            self.db.execute("UPDATE profiles SET highscore = MAX(highscore, ?) WHERE id = ?", (score, profile_id))
+
+    def top_runs(self, n=10, profile_id=None):
+        """[(name, score, frames, gems, ship, seed, played)] for the n best runs."""
+        query = ("SELECT p.name, r.score, r.frames, r.gems, r.ship, r.seed, r.played "
+                 "FROM runs r JOIN profiles p ON p.id = r.profile_id ")
+        if profile_id is None:
+            rows = self.db.execute(query + "ORDER BY r.score DESC LIMIT ?", (n,))
+        else:
+            rows = self.db.execute(query + "WHERE r.profile_id = ? ORDER BY r.score DESC LIMIT ?",
+                                   (profile_id, n))
+        return [row[:5] + (_unsigned(row[5]),) + row[6:] for row in rows]
+
+    def top_profiles(self, n=10):
+        """[(name, highscore)] for the n profiles with the best high scores."""
+        return self.db.execute("SELECT name, highscore FROM profiles ORDER BY highscore DESC LIMIT ?",
+                               (n,)).fetchall()
+
+
+class ProfileSave:
+    """One profile of a ProfileStore behind the same interface as savedata.SaveData."""
+
+    def __init__(self, name, path=DB_PATH, delay=0.5):
+        self.path = path
+        self.store = ProfileStore(path)
+        self.profile_id = self.store.profile_id(name)
+        if self.profile_id is None:
+            self.profile_id = self.store.create_profile(name)
+        self.data = self.store.load(self.profile_id)
+        self.writer_store = None # the writer thread's own connection, opened on its first write
+        self.writer = BackgroundWriter(self.write, delay, name="profile-writer", errors=(sqlite3.Error,))
+
+    def changed(self):
+        """Schedule a save of the current data. Cheap enough to call on any frame."""
+        data = self.data
+        self.writer.submit({"highscore": data["highscore"], "gems": data["gems"],
+                            "spaceships": [dict(ship) for ship in data["spaceships"]]})
+
+    def write(self, data):
+        if self.writer_store is None:
+            # Closed from the main thread once the writer has stopped
+            self.writer_store = ProfileStore(self.path, check_same_thread=False)
+        self.writer_store.save(self.profile_id, data)
+
+    def record_run(self, score, frames, gems, ship, seed):
+        self.store.record_run(self.profile_id, score, frames, gems, ship, seed)
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+        if self.writer_store is not None:
+            self.writer_store.close()
+        self.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage Asteroid Alley player profiles.")
+    parser.add_argument("--db", default=DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="create a profile from a save-data.json file")
+    importer.add_argument("path")
+    importer.add_argument("--name", required=True)
+    board = commands.add_parser("leaderboard", help="show the best runs")
+    board.add_argument("--profile", help="only this profile's runs")
+    board.add_argument("-n", type=int, default=10)
+    commands.add_parser("list", help="list profiles")
+    args = parser.parse_args()
+
+    store = ProfileStore(args.db)
+    try:
+        if args.command == "import":
+            store.import_json(args.path, args.name)
+            print(f"Imported {args.path} as {args.name}")
+        elif args.command == "list":
+            for profile_id, name, highscore, gems in store.profiles():
+                print(f"{name:<20} high score {highscore:>6}  gems {gems:>6}")
+        else:
+            profile_id = None
+            if args.profile is not None:
+                profile_id = store.profile_id(args.profile)
+                if profile_id is None:
+                    parser.error(f"no profile named {args.profile}")
+            for rank, (name, score, frames, gems, ship, seed, played) in enumerate(
+                    store.top_runs(args.n, profile_id), 1):
+                print(f"{rank:>3}. {name:<20} {score:>6}  {frames / TICK_RATE:7.1f}s  {gems:>3} gems  seed {seed}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
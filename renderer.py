@@ -0,0 +1,221 @@
+"""
+Draws a Simulation onto a pygame surface. Holds no game state of its own apart from
+references to the shared sprites, effect surfaces baked at start-up and the pre-rendered
+counter glyphs.
+
+SpriteBatch queues a frame's blits in draw order so they go out in one Surface.blits() call
+per group of layers.
+DirtyRects collects the screen regions that changed during a frame so present() can push
+only those to the display, and StaticLayer keeps an off-screen copy of content that only
+needs redrawing when the values it depends on change.
+"""
+
+from itertools import chain
+import pygame
+import text
+from simulation import (WIDTH, HEIGHT, PLAYER_SCALE, ASTEROID_SCALE, GEM_SIZE,
+                        SHIELD_SIZE, ASTEROID_IMAGES, SHIELD_IMAGES, GEM_IMAGE)
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+LIME = (100, 240, 40)
+SKY = (50, 170, 255)
+
+scorebox_width, scorebox_height = 155, 50
+
+
+class DirtyRects:
+    """
+    Changed screen regions for the current frame. When disabled, or after mark_all(),
+    present() falls back to a full flip.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.rects = []
+        self.full = True
+
+    def mark(self, rect):
+        self.rects.append(rect)
+
+    def mark_all(self):
+        self.full = True
+
+    def present(self):
+        if self.full or not self.enabled:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects = []
+        self.full = False
+
+
+class StaticLayer:
+    """An off-screen surface that is redrawn by `draw(surface, *inputs)` only when its inputs change."""
+
+    def __init__(self, size, draw):
+        self.surface = pygame.Surface(size).convert()
+        self.draw = draw
+        self.inputs = None
+
+    def update(self, *inputs):
+        """Redraw if the inputs changed; returns True when it did."""
+        if inputs == self.inputs:
+            return False
+        self.inputs = inputs
+        self.draw(self.surface, *inputs)
+        return True
+
+
+class SpriteBatch:
+    """
+    Blits queued into named layers and drawn with a single Surface.blits() call, layers in
+    the order they were named. The layer lists are kept from frame to frame, so queueing a
+    sprite allocates nothing but its position.
+    """
+
+    def __init__(self, *layers):
+        self.layers = [[] for _ in layers]
+        for name, layer in zip(layers, self.layers):
+            setattr(self, name, layer)
+
+    def draw(self, screen, *names, track=False):
+        """
+        Draw and empty the named layers, or every layer if none are named. With track=True,
+        returns the rects drawn.
+        """
+        layers = [getattr(self, name) for name in names] if names else self.layers
+        rects = screen.blits(chain.from_iterable(layers), doreturn=track)
+        for layer in layers:
+            layer.clear()
+        return rects
+
+
+def shield_bubble(radius=30, color=SKY + (64,)): # alpha 64 is 25% opaque
+    bubble = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(bubble, color, (radius, radius), radius)
+    return bubble.convert_alpha()
+
+
+def score_box(border_color):
+    box = pygame.Surface((scorebox_width, scorebox_height)).convert()
+    box.fill(border_color)
+    pygame.draw.rect(box, BLACK, (2, 2, scorebox_width - 4, scorebox_height - 4))
+    return box
+
+
+class GameRenderer:
+    """
+    Sprites and HUD pieces are queued into a SpriteBatch and drawn with one blits() call
+    each, so the profiler can time the two apart. Effects (the shield bubble, both score
+    box colours, the shield bars) are baked into surfaces once instead of being drawn
+    shape by shape.
+
+    With scrolling on, every frame redraws the whole screen. With scroll_speed=0 the
+    background is static, so only the regions under last frame's and this frame's sprites
+    and HUD are restored, redrawn and marked dirty.
+    """
+
+    def __init__(self, assets, ship_filename, dirty=None, scroll_speed=1, profiler=None):
+        self.dirty = dirty or DirtyRects(enabled=False)
+        self.profiler = profiler
+        self.scroll_speed = scroll_speed
+        self.drawn = None # rects drawn last frame, in static mode
+        self.bg = assets.image('images/background.png', colorkey=False)
+        self.player = assets.image(ship_filename, scale=PLAYER_SCALE)
+        self.asteroid_frames = [assets.image(f, scale=ASTEROID_SCALE) for f in ASTEROID_IMAGES]
+        self.gem = assets.image(GEM_IMAGE, size=(GEM_SIZE, GEM_SIZE))
+        self.shield_frames = [assets.image(f, size=(SHIELD_SIZE, SHIELD_SIZE)) for f in SHIELD_IMAGES]
+        self.score_counters = {color: text.Counter("Impact", 30, color, prefix="Score: ") for color in (LIME, WHITE)}
+        self.gem_counter = text.Counter("Consolas", 25, RED)
+
+        self.bubble = shield_bubble()
+        self.score_boxes = {color: score_box(color) for color in (LIME, WHITE)}
+        self.shield_bar = pygame.Surface((15, 30)).convert()
+        self.shield_bar.fill(SKY)
+        self.batch = SpriteBatch("pickups", "player", "asteroids", "hud")
+
+    def draw(self, screen, sim, total_gems, flashing=False, alpha=1.0):
+        """
+        Draw the world `alpha` of the way from the previous simulation step to the latest one.
+        Everything falls at a constant speed, so the previous position is the current one
+        minus a step's movement.
+        """
+        prof = self.profiler
+        batch = self.batch
+        back = alpha - 1.0 # fraction of a step to move things back by
+        if self.scroll_speed:
+            screen.fill(BLACK)
+
+            # Move background
+            offset = round((sim.frame + back) * self.scroll_speed)
+            bg_y1 = (offset + HEIGHT) % (HEIGHT * 2) - HEIGHT
+            bg_y2 = offset % (HEIGHT * 2) - HEIGHT
+            screen.blits(((self.bg, (0, bg_y1)), (self.bg, (0, bg_y2))), doreturn=False)
+            self.dirty.mark_all()
+        elif self.drawn is None:
+            screen.blit(self.bg, (0, 0))
+            self.dirty.mark_all()
+        else:
+            # Erase last frame's sprites
+            screen.blits([(self.bg, rect, rect) for rect in self.drawn], doreturn=False)
+            for rect in self.drawn:
+                self.dirty.mark(rect)
+        if prof:
+            prof.mark("background")
+
+        # Pickups
+        for gem in sim.gem_pickups:
+            batch.pickups.append((self.gem, (gem.x, gem.y + round(gem.speed * back))))
+        shield_image = self.shield_frames[sim.shield_frame_index]
+        for shield in sim.shield_pickups:
+            batch.pickups.append((shield_image, (shield.x, shield.y + round(shield.speed * back))))
+
+        # Player, with the shield bubble around it
+        player_x = round(sim.last_player_x + (sim.player_x - sim.last_player_x) * alpha)
+        batch.player.append((self.player, (player_x, sim.player_y)))
+        if sim.num_shields > 0:
+            player_pos = self.player.get_rect(topleft=(player_x, sim.player_y))
+            batch.player.append((self.bubble, self.bubble.get_rect(center=player_pos.center)))
+
+        # Asteroids
+        asteroid_image = self.asteroid_frames[sim.asteroid_frame_index]
+        lag = round(sim.asteroid_speed * back)
+        batch.asteroids.extend((asteroid_image, (rock.x, rock.y + lag)) for rock in sim.asteroids)
+
+        drawn = batch.draw(screen, "pickups", "player", "asteroids", track=not self.scroll_speed)
+        if prof:
+            prof.mark("sprites")
+
+        # Score box
+        score_box_color = LIME
+        if flashing and (sim.frame // sim.frame_delay) % 2:
+            score_box_color = WHITE
+        hud = batch.hud
+        hud.append((self.score_boxes[score_box_color], (WIDTH - scorebox_width - 14, 10)))
+        self.score_counters[score_box_color].layout(sim.score, (WIDTH - scorebox_width - 8, 18), hud)
+
+        # Gem display
+        hud.append((self.gem, (10, 10)))
+        self.gem_counter.layout(total_gems, (50, 18), hud)
+
+        # Shield display
+        for i in range(sim.num_shields):
+            hud.append((self.shield_bar, (15 + 30*i, HEIGHT - 40)))
+
+        hud_drawn = batch.draw(screen, "hud", track=not self.scroll_speed)
+        if drawn is not None:
+            drawn.extend(hud_drawn)
+
+        # Profiler overlay
+        if prof:
+            overlay = prof.draw_overlay(screen)
+            if overlay and drawn is not None:
+                drawn.append(overlay)
+            prof.mark("hud")
+
+        if not self.scroll_speed:
+            for rect in drawn:
+                self.dirty.mark(rect)
+            self.drawn = drawn
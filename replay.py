@@ -0,0 +1,132 @@
+"""
+Deterministic replays for Asteroid Alley.
+
+A run is fully determined by its seed, the ship it was played with and the LEFT/RIGHT keys
+held on each simulation step, so that is all a replay stores:
+
+    magic "AARP" | version u8 | seed u64 | frame count u32 | ship name length u16 | ship name
+    followed by 2 input bits per frame (bit 0 = LEFT, bit 1 = RIGHT), 4 frames per byte.
+
+Playback steps the headless simulation as fast as the CPU allows. ReplayPlayer keeps a
+snapshot every `snapshot_interval` frames so seeking only replays from the nearest one.
+
+Usage:
+    python replay.py replays/last-run.aarp [--seek FRAME]
+"""
+
+import argparse
+import os
+import struct
+import time
+from simulation import Simulation, load_shapes
+
+MAGIC = b"AARP"
+VERSION = 1 # bumped whenever the simulation rules change, since old inputs would desync
+HEADER = struct.Struct("<4sBQIH")
+
+LEFT = 1
+RIGHT = 2
+
+
+class Replay:
+    def __init__(self, seed, ship, frames=0, data=None):
+        self.seed = seed
+        self.ship = ship
+        self.frames = frames
+        self.data = data if data is not None else bytearray()
+
+    def record(self, left, right):
+        """Append the keys held on the next frame."""
+        shift = (self.frames % 4) * 2
+        if shift == 0:
+            self.data.append(0)
+        self.data[-1] |= ((LEFT if left else 0) | (RIGHT if right else 0)) << shift
+        self.frames += 1
+
+    def inputs(self, frame):
+        """(left, right) held on the given 0-based frame."""
+        bits = (self.data[frame // 4] >> ((frame % 4) * 2)) & 3
+        return bool(bits & LEFT), bool(bits & RIGHT)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        ship = self.ship.encode("utf-8")
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.frames, len(ship)))
+            file.write(ship)
+            file.write(self.data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            blob = file.read()
+        magic, version, seed, frames, ship_len = HEADER.unpack_from(blob)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        start = HEADER.size
+        ship = blob[start:start + ship_len].decode("utf-8")
+        data = bytearray(blob[start + ship_len:])
+        if len(data) != (frames + 3) // 4:
+            raise ValueError(f"{path} is truncated")
+        return cls(seed, ship, frames, data)
+
+
+class ReplayPlayer:
+    """Steps a Simulation through a Replay, with snapshot-indexed seeking."""
+
+    def __init__(self, replay, shapes=None, config=None, snapshot_interval=600):
+        self.replay = replay
+        self.sim = Simulation(shapes or load_shapes(replay.ship), config, replay.seed)
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {0: self.sim.snapshot()}
+
+    def step(self):
+        sim = self.sim
+        events = sim.step(*self.replay.inputs(sim.frame))
+        if sim.frame % self.snapshot_interval == 0 and sim.frame not in self.snapshots:
+            self.snapshots[sim.frame] = sim.snapshot()
+        return events
+
+    def play(self, until=None):
+        """Fast-forward to frame `until` (default: the end of the replay)."""
+        end = self.replay.frames if until is None else min(until, self.replay.frames)
+        while self.sim.frame < end:
+            self.step()
+        return self.sim
+
+    def build_index(self):
+        """Play the whole replay once so every snapshot is available to seek()."""
+        self.play()
+
+    def seek(self, frame):
+        """Jump to `frame`, restoring the nearest earlier snapshot and replaying from there."""
+        frame = max(0, min(frame, self.replay.frames))
+        start = (frame // self.snapshot_interval) * self.snapshot_interval
+        while start not in self.snapshots:
+            start -= self.snapshot_interval
+        if not start <= self.sim.frame <= frame:
+            self.sim.restore(self.snapshots[start])
+        return self.play(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back an Asteroid Alley replay headlessly.")
+    parser.add_argument("path")
+    parser.add_argument("--seek", type=int, help="stop at this frame instead of the end")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    sim = player.play() if args.seek is None else player.seek(args.seek)
+    elapsed = time.perf_counter() - start
+    print(f"ship: {replay.ship}  seed: {replay.seed}")
+    print(f"frame {sim.frame}/{replay.frames}  score: {sim.score}  gems: {sim.gems}  "
+          f"shields: {sim.num_shields}  alive: {sim.alive}")
+    print(f"{sim.frame / max(elapsed, 1e-9):.0f} frames/sec")
+
+
+if __name__ == "__main__":
+    main()
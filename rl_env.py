@@ -0,0 +1,294 @@
+"""
+Reinforcement-learning environment for Asteroid Alley.
+
+AsteroidAlleyEnv wraps the headless Simulation in a Gym-style API: reset() returns an
+observation and step(action) returns (observation, reward, done, info). Actions are 0 (no
+key), 1 (LEFT) and 2 (RIGHT). Observations come in two forms:
+
+- "features": a float32 vector of the player's x, each asteroid slot's lane and y, each
+  pickup slot's x and y and the number of shields held, scaled to roughly [0, 1]. Slots
+  are sized for the hardest difficulty level and hold -1 while empty
+- "frame": a uint8 (HEIGHT // downsample, WIDTH // downsample) occupancy image with the
+  bounding boxes of asteroids (255), the player (128), gems (192) and shields (64)
+
+The reward is the score gained on each step, plus `gem_reward` per gem, minus
+`death_penalty` when the run ends. `frame_skip` repeats each action for that many ticks.
+
+VecEnv runs many environments across worker processes. Observations, rewards, done flags
+and actions live in shared memory, so a step only sends one short message to each worker
+instead of pickling the observations back. Finished environments are reset straight away;
+their final score is left in `episode_scores` for the step they finished on.
+
+Requires numpy.
+
+Usage:
+    env = AsteroidAlleyEnv(obs_type="features", seed=1)
+    obs = env.reset()
+    obs, reward, done, info = env.step(2)
+
+    with VecEnv(256, workers=8, obs_type="frame") as envs:
+        obs = envs.reset()
+        obs, rewards, dones = envs.step(actions)
+
+    python rl_env.py --envs 256 --workers 8 --steps 200
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from simulation import WIDTH, HEIGHT, Simulation, SimConfig, load_shapes
+
+ACTIONS = ((False, False), (True, False), (False, True)) # (left, right) for each action
+NUM_ACTIONS = len(ACTIONS)
+OBS_TYPES = ("features", "frame")
+
+ASTEROID_PIXEL, PLAYER_PIXEL, GEM_PIXEL, SHIELD_PIXEL = 255, 128, 192, 64
+
+
+class AsteroidAlleyEnv:
+    def __init__(self, ship="images/spaceship.png", obs_type="features", config=None, seed=None,
+                 frame_skip=1, downsample=8, gem_reward=1.0, death_penalty=10.0, shapes=None):
+        if obs_type not in OBS_TYPES:
+            raise ValueError(f"obs_type must be one of {OBS_TYPES}, not {obs_type!r}")
+        self.shapes = shapes or load_shapes(ship)
+        self.config = config or SimConfig()
+        self.obs_type = obs_type
+        self.frame_skip = frame_skip
+        self.downsample = downsample
+        self.gem_reward = gem_reward
+        self.death_penalty = death_penalty
+        # An int seed, or a SeedSequence handed out by VecEnv
+        self.seeds = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.sim = None
+
+        cfg = self.config
+        if obs_type == "features":
+            size = 2 + 2 * (cfg.max_asteroids + cfg.max_gems + cfg.max_shields)
+            self.observation_shape = (size,)
+            self.observation_dtype = np.float32
+        else:
+            self.observation_shape = (HEIGHT // downsample, WIDTH // downsample)
+            self.observation_dtype = np.uint8
+
+    def reset(self, seed=None, out=None):
+        """Start a new run. Each reset draws a fresh seed from the env's seed unless one is given."""
+        if seed is None:
+            seed = int(self.seeds.spawn(1)[0].generate_state(1, np.uint64)[0])
+        self.sim = Simulation(self.shapes, self.config, seed)
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        sim = self.sim
+        left, right = ACTIONS[action]
+        score, gems = sim.score, sim.gems
+        for _ in range(self.frame_skip):
+            sim.step(left, right)
+            if not sim.alive:
+                break
+        reward = (sim.score - score) + self.gem_reward * (sim.gems - gems)
+        done = not sim.alive
+        if done:
+            reward -= self.death_penalty
+        info = {"score": sim.score, "gems": sim.gems, "frame": sim.frame}
+        return self.observe(out), reward, done, info
+
+    def observe(self, out=None):
+        """The current observation, written into `out` if it is given."""
+        if out is None:
+            out = np.empty(self.observation_shape, dtype=self.observation_dtype)
+        if self.obs_type == "features":
+            self.features(out)
+        else:
+            self.frame(out)
+        return out
+
+    def features(self, out):
+        sim = self.sim
+        cfg = self.config
+        out[0] = sim.player_x / WIDTH
+        i = 1
+        for rock in sim.asteroids:
+            out[i] = sim.lanes.lane_of(rock.x) / sim.lanes.num_lanes
+            out[i + 1] = rock.y / HEIGHT
+            i += 2
+        end = 1 + 2 * cfg.max_asteroids
+        out[i:end] = -1.0
+        i = end
+        for pickups, slots in ((sim.gem_pickups, cfg.max_gems), (sim.shield_pickups, cfg.max_shields)):
+            for entity in pickups:
+                out[i] = entity.x / WIDTH
+                out[i + 1] = entity.y / HEIGHT
+                i += 2
+            end = i + 2 * (slots - len(pickups))
+            out[i:end] = -1.0
+            i = end
+        out[i] = sim.num_shields
+
+    def frame(self, out):
+        sim = self.sim
+        shapes = self.shapes
+        out.fill(0)
+        self.paint(out, sim.shield_pickups, shapes.shield_frames[0], SHIELD_PIXEL)
+        self.paint(out, sim.gem_pickups, shapes.gem, GEM_PIXEL)
+        player = shapes.player
+        self.paint_box(out, sim.player_x, sim.player_y, player.width, player.height, PLAYER_PIXEL)
+        self.paint(out, sim.asteroids, shapes.asteroid_frames[0], ASTEROID_PIXEL)
+
+    def paint(self, out, entities, box, value):
+        for entity in entities:
+            self.paint_box(out, entity.x, entity.y, box.width, box.height, value)
+
+    def paint_box(self, out, x, y, width, height, value):
+        # Clip to the screen, then scale down to the observation grid
+        d = self.downsample
+        top, bottom = max(y, 0) // d, min(y + height, HEIGHT) // d
+        left, right = max(x, 0) // d, min(x + width, WIDTH) // d
+        if bottom > top and right > left:
+            out[top:bottom, left:right] = value
+
+
+def _worker(conn, first, count, env_kwargs, seed, names, obs_shape, obs_dtype):
+    """Own envs [first, first + count) and step them whenever the parent asks."""
+    buffers = {key: shared_memory.SharedMemory(name=name) for key, name in names.items()}
+    try:
+        n = first + count
+        obs = np.ndarray((n,) + obs_shape, dtype=obs_dtype, buffer=buffers["obs"].buf)[first:]
+        rewards = np.ndarray(n, dtype=np.float32, buffer=buffers["rewards"].buf)[first:]
+        dones = np.ndarray(n, dtype=np.bool_, buffer=buffers["dones"].buf)[first:]
+        scores = np.ndarray(n, dtype=np.int32, buffer=buffers["scores"].buf)[first:]
+        actions = np.ndarray(n, dtype=np.int8, buffer=buffers["actions"].buf)[first:]
+
+        shapes = load_shapes(env_kwargs.get("ship", "images/spaceship.png"))
+        seeds = np.random.SeedSequence(seed).spawn(n)[first:]
+        envs = [AsteroidAlleyEnv(**env_kwargs, seed=s, shapes=shapes) for s in seeds]
+        while True:
+            command = conn.recv()
+            if command == "step":
+                for i, env in enumerate(envs):
+                    _, rewards[i], done, info = env.step(actions[i], out=obs[i])
+                    dones[i] = done
+                    if done:
+                        scores[i] = info["score"]
+                        env.reset(out=obs[i])
+            elif command == "reset":
+                for i, env in enumerate(envs):
+                    env.reset(out=obs[i])
+                dones[:] = False
+            elif command == "close":
+                break
+            conn.send(None)
+    finally:
+        for shm in buffers.values():
+            shm.close()
+
+
+class VecEnv:
+    """
+    `num_envs` AsteroidAlleyEnvs split across `workers` processes. step() takes an array of
+    actions and returns (observations, rewards, dones) as views of the shared buffers, which
+    the next step overwrites; copy them if they need to outlive it.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=None, **env_kwargs):
+        workers = min(workers or os.cpu_count() or 1, num_envs)
+        probe = AsteroidAlleyEnv(**env_kwargs)
+        self.num_envs = num_envs
+        self.observation_shape = probe.observation_shape
+        self.observation_dtype = probe.observation_dtype
+
+        self.buffers = {}
+        self.obs = self.shared("obs", (num_envs,) + probe.observation_shape, probe.observation_dtype)
+        self.rewards = self.shared("rewards", num_envs, np.float32)
+        self.dones = self.shared("dones", num_envs, np.bool_)
+        self.episode_scores = self.shared("scores", num_envs, np.int32)
+        self.actions = self.shared("actions", num_envs, np.int8)
+        names = {key: shm.name for key, shm in self.buffers.items()}
+
+        ctx = mp.get_context("spawn")
+        self.conns = []
+        self.processes = []
+        per_worker, extra = divmod(num_envs, workers)
+        first = 0
+        for w in range(workers):
+            count = per_worker + (w < extra)
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(child, first, count, env_kwargs, seed, names,
+                                        probe.observation_shape, probe.observation_dtype))
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+            first += count
+
+    def shared(self, key, shape, dtype):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.buffers[key] = shm
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def broadcast(self, command):
+        for conn in self.conns:
+            conn.send(command)
+        for conn in self.conns:
+            conn.recv()
+
+    def reset(self):
+        self.broadcast("reset")
+        return self.obs
+
+    def step(self, actions):
+        self.actions[:] = actions
+        self.broadcast("step")
+        return self.obs, self.rewards, self.dones
+
+    def close(self):
+        if not self.processes:
+            return
+        for conn in self.conns:
+            conn.send("close")
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        # Drop our views before releasing the memory behind them
+        self.obs = self.rewards = self.dones = self.episode_scores = self.actions = None
+        for shm in self.buffers.values():
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure rollout throughput with random actions.")
+    parser.add_argument("--envs", type=int, default=256)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--steps", type=int, default=200, help="vector steps to time")
+    parser.add_argument("--obs", choices=OBS_TYPES, default="features")
+    parser.add_argument("--frame-skip", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with VecEnv(args.envs, args.workers, seed=args.seed, obs_type=args.obs, frame_skip=args.frame_skip) as envs:
+        envs.reset()
+        episodes = 0
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            _, _, dones = envs.step(rng.integers(0, NUM_ACTIONS, args.envs))
+            episodes += int(dones.sum())
+        elapsed = time.perf_counter() - start
+    steps = args.envs * args.steps
+    print(f"{steps} env steps in {elapsed:.2f}s: {steps / elapsed:.0f} steps/sec, "
+          f"{steps * args.frame_skip / elapsed:.0f} ticks/sec, {episodes} episodes finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Save-data persistence.
+
+SaveData loads save-data.json once and keeps the loaded dict as the authoritative copy for
+the rest of the session; screens read and change `save.data` directly and call changed()
+afterwards. Writes happen on a background thread: changes within `delay` seconds of each
+other are coalesced into a single write, and each write goes to a temporary file that is
+then renamed over the save, so a crash mid-write leaves the previous save intact. The
+writer thread is a BackgroundWriter, which profiles.ProfileSave uses for its database too.
+
+Saves carry a "version" number. Files from older versions (the original format has no
+version at all) are migrated when loaded and written back in the current format.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+SAVE_PATH = "save-data.json"
+VERSION = 1
+
+# Every ship the shop can offer; saves are topped up with any they are missing
+SHIPS = [
+    {"name": "SCF-13 Vanguard", "filename": "images/spaceship.png", "cost": 0},
+    {"name": "Cargo Freighter", "filename": "images/spaceship2.png", "cost": 50},
+    {"name": "Red Phantom", "filename": "images/spaceship3.png", "cost": 100},
+    {"name": "Dorito of Doom", "filename": "images/spaceship4.png", "cost": 150},
+    {"name": "The Abductor", "filename": "images/spaceship5.png", "cost": 200},
+    {"name": "Eagle One", "filename": "images/spaceship6.png", "cost": 300},
+]
+
+
+def default_data():
+    return migrate({"highscore": 0, "gems": 0, "spaceships": []})
+
+
+def _migrate_0(data):
+    """Unversioned saves: add ships missing from the list and make sure one is selected."""
+    known = {ship["filename"] for ship in data["spaceships"]}
+    for ship in SHIPS:
+        if ship["filename"] not in known:
+            data["spaceships"].append(dict(ship, unlocked=ship["cost"] == 0, selected=False))
+    if not any(ship["selected"] for ship in data["spaceships"]):
+        data["spaceships"][0]["selected"] = True
+        data["spaceships"][0]["unlocked"] = True
+    return data
+
+
+MIGRATIONS = {0: _migrate_0} # version -> function upgrading a save from it to the next version
+
+
+def migrate(data):
+    version = data.get("version", 0)
+    if version > VERSION:
+        raise ValueError(f"save data version {version} is newer than this game supports ({VERSION})")
+    while version < VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    data["version"] = VERSION
+    return data
+
+
+def write_atomic(path, payload):
+    """Replace the file at `path` with `payload` so readers only ever see the old or new file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".save-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class BackgroundWriter:
+    """
+    Hands payloads to `write` on a background thread. submit() only records the latest
+    payload; once none has come in for `delay` seconds it is written, so a burst of changes
+    costs one write. `errors` are caught on the thread and raised again by flush().
+    """
+
+    def __init__(self, write, delay=0.5, name="save-writer", errors=(OSError,)):
+        self.write = write
+        self.delay = delay
+        self.errors = errors
+        self.error = None # the last failed write's exception, raised again by flush()
+
+        self.lock = threading.Condition()
+        self.pending = None # latest payload not yet written
+        self.changed_at = 0.0
+        self.urgent = False
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, payload):
+        with self.lock:
+            self.pending = payload
+            self.changed_at = time.monotonic()
+            self.lock.notify()
+
+    def flush(self):
+        """Block until every payload so far has been written."""
+        with self.lock:
+            self.urgent = True
+            self.lock.notify()
+            while self.pending is not None and self.thread.is_alive():
+                self.lock.wait()
+            self.urgent = False
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.closed = True
+            self.lock.notify()
+        self.thread.join()
+
+    def run(self):
+        while True:
+            with self.lock:
+                # Wait for a change, then until no further change has come in for `delay`
+                while not self.closed:
+                    if self.pending is not None:
+                        remaining = self.changed_at + self.delay - time.monotonic()
+                        if self.urgent or remaining <= 0:
+                            break
+                        self.lock.wait(remaining)
+                    else:
+                        self.lock.wait()
+                if self.pending is None:
+                    return
+                payload = self.pending
+            try:
+                self.write(payload)
+                error = None
+            except self.errors as e:
+                error = e
+            with self.lock:
+                self.error = error
+                if self.pending is payload:
+                    self.pending = None
+                self.lock.notify_all()
+
+
+class SaveData:
+    def __init__(self, path=SAVE_PATH, delay=0.5):
+        self.path = path
+        self.data, outdated = self.load()
+        self.writer = BackgroundWriter(lambda payload: write_atomic(self.path, payload), delay)
+        if outdated:
+            self.changed()
+
+    def load(self):
+        """Returns the save's data and whether the file needs writing in the current format."""
+        if not os.path.exists(self.path):
+            return default_data(), True
+        with open(self.path, "r") as file:
+            data = json.load(file)
+        outdated = data.get("version", 0) != VERSION
+        return migrate(data), outdated
+
+    def changed(self):
+        """Schedule a write of the current data. Cheap enough to call on any frame."""
+        self.writer.submit(json.dumps(self.data, indent=4))
+
+    def record_run(self, score, frames, gems, ship, seed):
+        pass # the JSON save only keeps the high score, which the caller updates in data
+
+    def flush(self):
+        """Block until every change so far is on disk."""
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
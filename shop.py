@@ -0,0 +1,160 @@
+"""
+Shop catalog helpers: an index over the ship list, a background thumbnail loader and the
+scrolling grid that decides which ships are on screen.
+
+ShipIndex keeps one sorted order per sort key and the selected ship's position, so opening
+the shop, sorting, filtering and starting a run never sort or search the whole catalog
+again. Positions everywhere are indexes into save.data["spaceships"].
+
+ThumbnailStore loads previews on a worker thread through the shared Assets, which keeps
+scaled pixels in its on-disk cache and drops the least recently used ones from memory.
+get() never blocks: it returns None until the thumbnail is ready and the grid draws an
+empty cell meanwhile.
+
+ShopGrid lays the filtered, sorted catalog out in rows and only ever touches the rows
+scrolled into view (plus one row either side to prefetch thumbnails).
+"""
+
+import queue
+import threading
+import pygame
+from assets import surface_bytes
+
+SORTS = ("catalog", "cost", "name")
+FILTERS = ("all", "owned", "locked")
+
+
+class ShipIndex:
+    def __init__(self, ships):
+        self.ships = ships
+        self.orders = {
+            "catalog": list(range(len(ships))),
+            "cost": sorted(range(len(ships)), key=lambda i: (ships[i]["cost"], i)),
+            "name": sorted(range(len(ships)), key=lambda i: (ships[i]["name"].lower(), i)),
+        }
+        self.selected = next((i for i, ship in enumerate(ships) if ship["selected"]), 0)
+        self.views = {}
+
+    def view(self, sort="catalog", show="all"):
+        """Positions of the ships to list, in display order. Cached until ownership changes."""
+        key = (sort, show)
+        positions = self.views.get(key)
+        if positions is None:
+            order = self.orders[sort]
+            if show == "all":
+                positions = order
+            else:
+                owned = show == "owned"
+                positions = [i for i in order if self.ships[i]["unlocked"] == owned]
+            self.views[key] = positions
+        return positions
+
+    def select(self, i):
+        self.ships[self.selected]["selected"] = False
+        self.ships[i]["selected"] = True
+        self.selected = i
+
+    def unlock(self, i):
+        self.ships[i]["unlocked"] = True
+        self.views.clear() # the owned/locked filters changed
+
+
+class ThumbnailStore:
+    def __init__(self, assets, scale):
+        self.assets = assets
+        self.scale = scale
+        self.ready = {} # filename -> Surface
+        self.pending = set()
+        self.requests = queue.LifoQueue() # the newest request is usually the row just scrolled to
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def get(self, filename):
+        """The thumbnail if it has loaded; otherwise queue it and return None."""
+        image = self.ready.get(filename)
+        if image is None:
+            self.request(filename)
+        return image
+
+    def request(self, filename):
+        with self.lock:
+            if filename in self.ready or filename in self.pending:
+                return
+            self.pending.add(filename)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="thumbnails", daemon=True)
+                self.thread.start()
+        self.requests.put(filename)
+
+    def run(self):
+        while True:
+            filename = self.requests.get()
+            if filename is None:
+                return
+            image = self.assets.image(filename, scale=self.scale)
+            with self.lock:
+                self.ready[filename] = image
+                self.pending.discard(filename)
+
+    def usage(self):
+        """(thumbnails held, bytes of pixels behind them); atlas sprites are counted with the atlas."""
+        with self.lock:
+            images = list(self.ready.values())
+        return len(images), sum(surface_bytes(image) for image in images if image.get_parent() is None)
+
+    def forget(self, keep):
+        """Let go of every thumbnail whose filename isn't in `keep`; Assets still caches them."""
+        with self.lock:
+            for filename in [f for f in self.ready if f not in keep]:
+                del self.ready[filename]
+
+    def close(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+class ShopGrid:
+    """Cell rects for the visible part of the listing. `scroll` is the first visible row."""
+
+    def __init__(self, x, y, columns=3, rows=2, gap=100, box_size=70):
+        self.x, self.y = x, y
+        self.columns = columns
+        self.rows = rows
+        self.gap = gap
+        self.box_size = box_size
+        self.scroll = 0
+        self.rect = pygame.Rect(x, y, gap * (columns - 1) + box_size, gap * (rows - 1) + box_size)
+
+    def total_rows(self, count):
+        return (count + self.columns - 1) // self.columns
+
+    def scroll_by(self, rows, count):
+        self.scroll = max(0, min(self.scroll + rows, self.total_rows(count) - self.rows))
+
+    def scroll_to(self, slot, count):
+        """Scroll just far enough to show list slot `slot`."""
+        row = slot // self.columns
+        if row < self.scroll:
+            self.scroll_by(row - self.scroll, count)
+        elif row >= self.scroll + self.rows:
+            self.scroll_by(row - self.scroll - self.rows + 1, count)
+
+    def visible(self, count):
+        """(slot, rect) for every list slot on screen."""
+        first = self.scroll * self.columns
+        last = min(count, first + self.rows * self.columns)
+        cells = []
+        for slot in range(first, last):
+            row, col = divmod(slot - first, self.columns)
+            cells.append((slot, pygame.Rect(self.x + self.gap * col, self.y + self.gap * row,
+                                            self.box_size, self.box_size)))
+        return cells
+
+    def prefetch(self, count):
+        """List slots in the rows just above and below the visible ones."""
+        above = range(max(0, (self.scroll - 1) * self.columns), self.scroll * self.columns)
+        below_start = (self.scroll + self.rows) * self.columns
+        below = range(min(count, below_start), min(count, below_start + self.columns))
+        return list(above) + list(below)
@@ -0,0 +1,314 @@
+"""
+Headless simulation core for Asteroid Alley.
+
+Steps the world state (player, asteroids, gem and shield pickups, score and shields) on a
+fixed timestep. Asteroids and pickups are entities.Entity objects recycled through an
+EntityPool, and any number of gems and shields can be falling at once. Asteroid speed,
+count and spawn patterns ramp up through the levels of a difficulty.Difficulty. Nothing
+in here touches the display or the mixer, so it can run as fast as the CPU allows on
+machines without a screen or sound card. Drawing lives in renderer.py.
+
+Usage:
+    shapes = load_shapes("images/spaceship.png")
+    sim = Simulation(shapes, seed=1234)
+    while sim.alive:
+        events = sim.step(left=False, right=True)
+"""
+
+import random
+from collision import hitbox, collide
+from difficulty import Difficulty
+from entities import ASTEROID, GEM, SHIELD, EntityPool
+from lanes import LaneIndex
+
+WIDTH, HEIGHT = 400, 600
+TICK_RATE = 60 # simulation steps per second
+PLAYER_SCALE = 1.6
+ASTEROID_SCALE = 0.6
+GEM_SIZE = 35
+SHIELD_SIZE = 40
+
+ASTEROID_IMAGES = [f"images/asteroid/asteroid{i}.png" for i in range(1, 9)]
+SHIELD_IMAGES = [f"images/shield/shield{i}.png" for i in range(1, 5)]
+GEM_IMAGE = "images/gem.png"
+
+
+def seconds(s):
+    """Convert a duration in seconds to a number of simulation steps."""
+    return int(s * TICK_RATE)
+
+
+class SimConfig:
+    """
+    Difficulty and pacing parameters for a run. Timer ranges are in steps. asteroid_speed
+    and num_asteroids are the starting values that `difficulty` levels add to; pass
+    difficulty.FIXED to keep them for the whole run.
+    """
+
+    def __init__(self, asteroid_speed=6, num_asteroids=5, player_speed=6, gem_speed=4,
+                 shield_speed=4, first_gem=(seconds(10), seconds(15)),
+                 gem_interval=(seconds(10), seconds(20)),
+                 shield_interval=(seconds(40), seconds(70)), milestone_step=100,
+                 max_gems=1, max_shields=1, difficulty=None):
+        self.asteroid_speed = asteroid_speed
+        self.num_asteroids = num_asteroids
+        self.player_speed = player_speed
+        self.gem_speed = gem_speed
+        self.shield_speed = shield_speed
+        self.first_gem = first_gem
+        self.gem_interval = gem_interval
+        self.shield_interval = shield_interval
+        self.milestone_step = milestone_step
+        self.max_gems = max_gems # pickups that can be falling at the same time
+        self.max_shields = max_shields
+        self.difficulty = difficulty or Difficulty()
+
+    @property
+    def max_asteroids(self):
+        """Asteroids on screen at the hardest level."""
+        return self.num_asteroids + self.difficulty.max_extra_asteroids
+
+
+class Shapes:
+    """Collision hitboxes for the player, every asteroid frame, the gem and every shield frame."""
+
+    def __init__(self, player, asteroid_frames, gem, shield_frames):
+        self.player = player
+        self.asteroid_frames = asteroid_frames
+        self.gem = gem
+        self.shield_frames = shield_frames
+
+
+def load_shapes(ship_filename):
+    player = hitbox(ship_filename, scale=PLAYER_SCALE)
+    asteroid_frames = [hitbox(f, scale=ASTEROID_SCALE) for f in ASTEROID_IMAGES]
+    gem = hitbox(GEM_IMAGE, size=(GEM_SIZE, GEM_SIZE))
+    shield_frames = [hitbox(f, size=(SHIELD_SIZE, SHIELD_SIZE)) for f in SHIELD_IMAGES]
+    return Shapes(player, asteroid_frames, gem, shield_frames)
+
+
+class Simulation:
+    """
+    World state for one run. Call step() once per tick with the held arrow keys; it returns
+    a list of event names ("gem", "shield", "shield_lost", "death", "milestone") so the caller
+    can play sounds or log them.
+    """
+
+    frame_delay = 10 # steps per animation frame
+    profiler = None # optional profiler.FrameProfiler to charge each phase of step() to
+
+    def __init__(self, shapes, config=None, seed=None):
+        self.shapes = shapes
+        self.config = config or SimConfig()
+        # Every random decision comes from this run's own generator so a seed reproduces the run
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        cfg = self.config
+
+        self.frame = 0
+        self.alive = True
+        self.score = 0
+        self.milestone = cfg.milestone_step
+        self.num_shields = 0
+        self.gems = 0 # gems collected this run
+
+        # Player
+        self.player_x = WIDTH // 2 - shapes.player.width // 2
+        self.last_player_x = self.player_x # before the latest step, for interpolated drawing
+        self.player_y = 500
+
+        # Asteroids
+        asteroid = shapes.asteroid_frames[0]
+        self.asteroid_width = asteroid.width
+        num_lanes = (WIDTH - self.asteroid_width) // self.asteroid_width + 1
+        # A row is passable while some lane has no asteroid within an asteroid plus a ship's height
+        self.lanes = LaneIndex(num_lanes, self.asteroid_width, min_gap=100,
+                               clearance=asteroid.height + shapes.player.height)
+        self.pool = EntityPool(cfg.max_asteroids + cfg.max_gems + cfg.max_shields)
+        self.asteroids = []
+        self.level = -1
+        self.set_level(0)
+
+        # Pickups
+        self.gem_pickups = []
+        self.gem_time = self.rng.randint(*cfg.first_gem)
+        self.shield_pickups = []
+        self.shield_time = self.rng.randint(*cfg.shield_interval)
+
+    @property
+    def asteroid_frame_index(self):
+        return (self.frame // self.frame_delay) % len(self.shapes.asteroid_frames)
+
+    @property
+    def shield_frame_index(self):
+        return (self.frame // self.frame_delay) % len(self.shapes.shield_frames)
+
+    def random_lane(self):
+        return (self.rng.randint(0, WIDTH - self.asteroid_width) // self.asteroid_width) * self.asteroid_width
+
+    def set_level(self, index):
+        """
+        Switch to difficulty level `index`: set the asteroid speed, spawn any extra asteroids
+        the level adds and take further spawns from that level's schedule.
+        """
+        cfg = self.config
+        difficulty = cfg.difficulty
+        level = difficulty.levels[index]
+        self.level = index
+        self.next_level = difficulty.next_start(index)
+        self.schedule = difficulty.schedule(self.seed, index, self.lanes.num_lanes, HEIGHT)
+        self.asteroid_speed = cfg.asteroid_speed + level.speed
+        for rock in self.asteroids:
+            rock.speed = self.asteroid_speed
+        while len(self.asteroids) < cfg.num_asteroids + level.asteroids:
+            entity = self.pool.acquire(ASTEROID, 0, 0, self.asteroid_speed)
+            self.spawn_asteroid(entity)
+            self.asteroids.append(entity)
+
+    def spawn_asteroid(self, asteroid):
+        """Place the asteroid at the next spawn in the schedule. Returns the height asked for."""
+        lane, height = self.schedule.pop()
+        asteroid.x = lane * self.asteroid_width
+        asteroid.y = self.lanes.place(asteroid.x, height)
+        return height
+
+    def respawn_asteroid(self, asteroid):
+        self.lanes.remove(asteroid.x, asteroid.y)
+        return self.spawn_asteroid(asteroid)
+
+    def snapshot(self):
+        """Capture everything needed to resume the run later with restore()."""
+        return (self.frame, self.alive, self.score, self.milestone, self.num_shields, self.gems,
+                self.player_x, [entity.state() for entity in self.asteroids],
+                [entity.state() for entity in self.gem_pickups], self.gem_time,
+                [entity.state() for entity in self.shield_pickups], self.shield_time,
+                self.lanes.travel, [list(lane) for lane in self.lanes.lanes],
+                self.rng.getstate(), self.level, self.schedule.state())
+
+    def restore(self, snapshot):
+        (self.frame, self.alive, self.score, self.milestone, self.num_shields, self.gems,
+         self.player_x, asteroids, gems, self.gem_time, shields, self.shield_time,
+         self.lanes.travel, lanes, rng_state, level, schedule) = snapshot
+        self.last_player_x = self.player_x
+        difficulty = self.config.difficulty
+        self.level = level
+        self.next_level = difficulty.next_start(level)
+        self.schedule = difficulty.schedule(self.seed, level, self.lanes.num_lanes, HEIGHT)
+        self.schedule.restore(schedule)
+        self.asteroid_speed = self.config.asteroid_speed + difficulty.levels[level].speed
+        self.pool.restore(self.asteroids, asteroids)
+        self.pool.restore(self.gem_pickups, gems)
+        self.pool.restore(self.shield_pickups, shields)
+        self.lanes.lanes = [list(lane) for lane in lanes]
+        self.rng.setstate(rng_state)
+
+    def step(self, left=False, right=False):
+        cfg = self.config
+        shapes = self.shapes
+        prof = self.profiler
+        events = []
+        self.frame += 1
+        now = self.frame
+
+        pool = self.pool
+        gems = self.gem_pickups
+        shields = self.shield_pickups
+
+        # Gems
+        if now >= self.gem_time:
+            self.gem_time = now + self.rng.randint(*cfg.gem_interval)
+            if len(gems) < cfg.max_gems:
+                gems.append(pool.acquire(GEM, self.random_lane() + 40, -30, cfg.gem_speed))
+        for i in range(len(gems) - 1, -1, -1):
+            gem = gems[i]
+            gem.y += gem.speed
+            if gem.y > HEIGHT:
+                pool.remove(gems, i)
+
+        # Shields
+        if now >= self.shield_time:
+            self.shield_time = now + self.rng.randint(*cfg.shield_interval)
+            if len(shields) < cfg.max_shields:
+                shields.append(pool.acquire(SHIELD, self.random_lane() + 30, -70, cfg.shield_speed))
+        for i in range(len(shields) - 1, -1, -1):
+            shield = shields[i]
+            shield.y += shield.speed
+            if shield.y > HEIGHT:
+                pool.remove(shields, i)
+        if prof:
+            prof.mark("pickups")
+
+        # Player movement
+        self.last_player_x = self.player_x
+        if left and self.player_x > 0:
+            self.player_x -= cfg.player_speed
+        if right and self.player_x + shapes.player.width < WIDTH:
+            self.player_x += cfg.player_speed
+        player = shapes.player
+        player_x, player_y = self.player_x, self.player_y
+        if prof:
+            prof.mark("movement")
+
+        # Check gem collision
+        for i in range(len(gems) - 1, -1, -1):
+            gem = gems[i]
+            if collide(player, player_x, player_y, shapes.gem, gem.x, gem.y):
+                events.append("gem")
+                self.gems += 1
+                pool.remove(gems, i)
+
+        # Check shield collision
+        shield_box = shapes.shield_frames[self.shield_frame_index]
+        for i in range(len(shields) - 1, -1, -1):
+            shield = shields[i]
+            if collide(player, player_x, player_y, shield_box, shield.x, shield.y):
+                events.append("shield")
+                self.num_shields += 1
+                pool.remove(shields, i)
+        if prof:
+            prof.mark("collisions")
+
+        # Asteroid movement
+        asteroid = shapes.asteroid_frames[self.asteroid_frame_index]
+        self.lanes.advance(self.asteroid_speed)
+        for rock in self.asteroids:
+            rock.y += rock.speed
+            if rock.y > HEIGHT: # reset asteroid position; the lane index keeps spawns apart
+                self.score += 1
+                self.respawn_asteroid(rock)
+            # Check asteroid collision with player
+            if self.alive and collide(player, player_x, player_y, asteroid, rock.x, rock.y):
+                if self.num_shields > 0:
+                    self.num_shields -= 1
+                    events.append("shield_lost")
+                    self.respawn_asteroid(rock)
+                else:
+                    events.append("death")
+                    self.alive = False
+
+        # Milestone reached; asteroids wrapping together can carry the score past one
+        while self.score >= self.milestone:
+            events.append("milestone")
+            self.milestone += cfg.milestone_step
+
+        # Next difficulty level reached
+        if self.next_level is not None:
+            progress = self.score if cfg.difficulty.by == "score" else now
+            if progress >= self.next_level:
+                self.set_level(self.level + 1)
+        if prof:
+            prof.mark("asteroids")
+
+        return events
+
+
+def run_headless(shapes, policy, config=None, seed=None, max_frames=None):
+    """
+    Play one run to the end without a display. `policy(sim)` returns (left, right) for
+    each step. Returns the finished Simulation.
+    """
+    sim = Simulation(shapes, config, seed)
+    while sim.alive and (max_frames is None or sim.frame < max_frames):
+        left, right = policy(sim)
+        sim.step(left, right)
+    return sim
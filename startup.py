@@ -0,0 +1,88 @@
+"""
+Staged startup.
+
+StartupTimer records how long each step of startup takes, from the moment it is created
+to the first menu frame. BackgroundLoader runs the remaining loading steps on a worker
+thread while the menu is already on screen; anything that needs their results calls wait()
+first, which only blocks if they haven't finished yet.
+"""
+
+import threading
+import time
+
+BUDGET_MS = 500 # target time from launch to the first menu frame
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.stages = [] # (name, ms, thread) in the order they finished
+        self.first_frame_ms = None
+        self.lock = threading.Lock()
+
+    def mark(self, name):
+        """Charge the time since the previous mark on the main thread to `name`."""
+        now = time.perf_counter()
+        with self.lock:
+            self.stages.append((name, (now - self.last) * 1000, "main"))
+        self.last = now
+
+    def record(self, name, ms, thread):
+        with self.lock:
+            self.stages.append((name, ms, thread))
+
+    def frame_presented(self):
+        """Call after each menu frame; only the first one is recorded."""
+        if self.first_frame_ms is None:
+            self.mark("first frame")
+            self.first_frame_ms = (time.perf_counter() - self.start) * 1000
+
+    def report(self):
+        lines = ["Startup:"]
+        with self.lock:
+            stages = list(self.stages)
+        for name, ms, thread in stages:
+            where = "" if thread == "main" else f"  ({thread})"
+            lines.append(f"  {name:<16}{ms:8.1f} ms{where}")
+        if self.first_frame_ms is not None:
+            verdict = "over" if self.first_frame_ms > BUDGET_MS else "within"
+            lines.append(f"  first menu frame after {self.first_frame_ms:.1f} ms "
+                         f"({verdict} the {BUDGET_MS} ms budget)")
+        return "\n".join(lines)
+
+
+class BackgroundLoader:
+    def __init__(self, timer=None):
+        self.timer = timer
+        self.done = threading.Event()
+        self.error = None
+        self.thread = None
+
+    def start(self, steps):
+        """Run each (name, function) in `steps` in order on a worker thread."""
+        self.thread = threading.Thread(target=self.run, args=(steps,), name="loader", daemon=True)
+        self.thread.start()
+
+    def run(self, steps):
+        try:
+            for name, function in steps:
+                start = time.perf_counter()
+                function()
+                if self.timer is not None:
+                    self.timer.record(name, (time.perf_counter() - start) * 1000, "background")
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def ready(self):
+        return self.done.is_set()
+
+    def wait(self):
+        """Block until every step has run, re-raising the first step that failed."""
+        if self.thread is None:
+            return
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
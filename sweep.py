@@ -0,0 +1,278 @@
+"""
+Difficulty-tuning sweeps for Asteroid Alley.
+
+Plays many headless runs for every combination of SimConfig parameters (a grid search) or
+for randomly drawn combinations (a random search), with scripted players, across a pool
+of worker processes. Each finished run is appended to a JSON Lines file as soon as it
+comes back, so an interrupted sweep loses nothing: running the same command again skips
+the runs already in the file and carries on. Once every run is in, the survival time and
+score distributions of each configuration are printed and optionally written as JSON.
+
+Run i of every configuration uses seed `--seed + i`, so configurations are compared on the
+same asteroid layouts.
+
+Parameters (timer ranges are given in seconds as LOW-HIGH):
+    asteroid_speed, num_asteroids, player_speed, gem_speed, shield_speed, milestone_step,
+    first_gem, gem_interval, shield_interval
+
+Players:
+    idle    never moves
+    random  holds a random direction for a random number of steps
+    dodge   heads for the lane with the most room above the ship
+
+Usage:
+    python sweep.py --grid asteroid_speed=5,6,7 num_asteroids=4,5,6 --runs 200 --out sweep.jsonl
+    python sweep.py --random 50 asteroid_speed=4:9 gem_interval=5-10:15-25 --players dodge
+    python sweep.py --out sweep.jsonl --summary-only --summary summary.json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+from profiler import percentile
+from simulation import HEIGHT, TICK_RATE, SimConfig, load_shapes, run_headless, seconds
+
+INT_PARAMS = ("asteroid_speed", "num_asteroids", "player_speed", "gem_speed", "shield_speed", "milestone_step")
+RANGE_PARAMS = ("first_gem", "gem_interval", "shield_interval")
+PARAMS = INT_PARAMS + RANGE_PARAMS
+
+
+def parse_value(name, text):
+    """A parameter value as stored in results: an int, or a [low, high] pair of seconds."""
+    if name in INT_PARAMS:
+        return int(text)
+    low, high = text.split("-")
+    return [float(low), float(high)]
+
+
+def make_config(params):
+    values = {}
+    for name, value in params.items():
+        values[name] = (seconds(value[0]), seconds(value[1])) if name in RANGE_PARAMS else value
+    return SimConfig(**values)
+
+
+def parse_specs(specs):
+    """Split NAME=VALUES arguments into {name: text}, rejecting unknown parameters."""
+    parsed = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or name not in PARAMS:
+            raise SystemExit(f"bad parameter {spec!r}; expected NAME=VALUES with NAME one of {', '.join(PARAMS)}")
+        parsed[name] = values
+    return parsed
+
+
+def grid_configs(specs):
+    """Every combination of the comma-separated values for each parameter."""
+    axes = {name: [parse_value(name, v) for v in values.split(",")] for name, values in parse_specs(specs).items()}
+    names = list(axes)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(axes[n] for n in names))]
+
+
+def random_configs(specs, count, seed):
+    """
+    `count` configurations drawn uniformly from LOW:HIGH for each parameter. For timer
+    ranges LOW and HIGH are themselves ranges, so gem_interval=5-10:15-25 draws the shortest
+    interval from 5 to 15 and the longest from 10 to 25.
+    """
+    rng = random.Random(seed)
+    bounds = {}
+    for name, values in parse_specs(specs).items():
+        low, high = values.split(":")
+        bounds[name] = (parse_value(name, low), parse_value(name, high))
+    configs = []
+    for _ in range(count):
+        params = {}
+        for name, (low, high) in bounds.items():
+            if name in INT_PARAMS:
+                params[name] = rng.randint(low, high)
+            else:
+                a = round(rng.uniform(low[0], high[0]), 1)
+                b = round(rng.uniform(max(a, low[1]), max(a, high[1])), 1)
+                params[name] = [a, b]
+        configs.append(params)
+    return configs
+
+
+def idle_player(seed):
+    return lambda sim: (False, False)
+
+
+def random_player(seed):
+    rng = random.Random(seed)
+    held = [(False, False), 0]
+
+    def policy(sim):
+        if held[1] <= 0:
+            held[0] = rng.choice(((False, False), (True, False), (False, True)))
+            held[1] = rng.randint(5, 40)
+        held[1] -= 1
+        return held[0]
+    return policy
+
+
+def dodge_player(seed):
+    def policy(sim):
+        player = sim.shapes.player
+        rock_height = sim.shapes.asteroid_frames[0].height
+        lanes = sim.lanes
+        # Room above the ship in each lane: distance to the lowest asteroid still above it
+        room = [HEIGHT] * lanes.num_lanes
+        for rock in sim.asteroids:
+            if rock.y < sim.player_y + player.height:
+                lane = lanes.lane_of(rock.x)
+                room[lane] = min(room[lane], sim.player_y - (rock.y + rock_height))
+        center = sim.player_x + player.width // 2
+        here = min(lanes.lane_of(center), lanes.num_lanes - 1)
+        best = max(range(lanes.num_lanes), key=lambda lane: (room[lane], -abs(lane - here)))
+        target = best * lanes.lane_width + lanes.lane_width // 2
+        if abs(target - center) <= sim.config.player_speed:
+            return False, False
+        return target < center, target > center
+    return policy
+
+
+PLAYERS = {"idle": idle_player, "random": random_player, "dodge": dodge_player}
+
+_shapes = None
+
+
+def _run(job):
+    """Play one run in a worker. The ship's shapes are loaded once per process."""
+    global _shapes
+    params, player, run, seed, ship, max_frames = job
+    if _shapes is None:
+        _shapes = load_shapes(ship)
+    sim = run_headless(_shapes, PLAYERS[player](seed), make_config(params), seed, max_frames)
+    return {"config": params, "player": player, "run": run, "seed": seed,
+            "frames": sim.frame, "score": sim.score, "gems": sim.gems, "died": not sim.alive}
+
+
+def run_key(params, player, run):
+    return json.dumps(params, sort_keys=True), player, run
+
+
+def load_results(path):
+    """Results already in the file. A line cut short by an interruption is ignored."""
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+    return results
+
+
+def trim_partial_line(path):
+    """Cut off a last line left without its newline by an interruption, so appends start clean."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 4096)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != end:
+            f.truncate(pos)
+
+
+def distribution(values):
+    values = sorted(values)
+    return {"mean": round(sum(values) / len(values), 2), "min": values[0],
+            **{f"p{p}": percentile(values, p) for p in (10, 50, 90)}, "max": values[-1]}
+
+
+def summarize(results):
+    """Survival time (seconds) and score distributions per (configuration, player)."""
+    groups = {}
+    for row in results:
+        groups.setdefault((json.dumps(row["config"], sort_keys=True), row["player"]), []).append(row)
+    summary = []
+    for (config, player), rows in sorted(groups.items()):
+        summary.append({
+            "config": json.loads(config), "player": player, "runs": len(rows),
+            "survival_s": distribution([row["frames"] / TICK_RATE for row in rows]),
+            "score": distribution([row["score"] for row in rows]),
+            "survived": sum(not row["died"] for row in rows),
+        })
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'config':<48} {'player':<7} {'runs':>5} {'survival p10/p50/p90 s':>24} {'score mean':>10} {'p50':>6}")
+    for entry in summary:
+        config = " ".join(f"{k}={v}" for k, v in sorted(entry["config"].items())) or "(defaults)"
+        s = entry["survival_s"]
+        survival = f"{s['p10']:.0f}/{s['p50']:.0f}/{s['p90']:.0f}"
+        print(f"{config:<48} {entry['player']:<7} {entry['runs']:>5} {survival:>24} "
+              f"{entry['score']['mean']:>10} {entry['score']['p50']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Asteroid Alley difficulty parameters with scripted players.")
+    parser.add_argument("params", nargs="*", metavar="NAME=VALUES",
+                        help="grid: comma-separated values; random: LOW:HIGH bounds")
+    parser.add_argument("--grid", action="store_true", help="try every combination of the values (default)")
+    parser.add_argument("--random", type=int, metavar="N", help="try N random configurations within the bounds")
+    parser.add_argument("--players", default="dodge", help=f"comma-separated players: {', '.join(PLAYERS)}")
+    parser.add_argument("--runs", type=int, default=100, help="runs per configuration and player")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-seconds", type=float, default=600, help="stop runs that survive this long")
+    parser.add_argument("--ship", default="images/spaceship.png")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--out", default="sweep.jsonl", help="results file, appended to and resumed from")
+    parser.add_argument("--summary", metavar="PATH", help="also write the per-configuration summary to PATH")
+    parser.add_argument("--summary-only", action="store_true", help="summarize --out without running anything")
+    args = parser.parse_args()
+
+    players = args.players.split(",")
+    for player in players:
+        if player not in PLAYERS:
+            raise SystemExit(f"unknown player {player!r}; choose from {', '.join(PLAYERS)}")
+
+    done = load_results(args.out)
+    if not args.summary_only:
+        configs = random_configs(args.params, args.random, args.seed) if args.random else grid_configs(args.params)
+        finished = {run_key(row["config"], row["player"], row["run"]) for row in done}
+        max_frames = seconds(args.max_seconds)
+        jobs = [(params, player, run, args.seed + run, args.ship, max_frames)
+                for params in configs for player in players for run in range(args.runs)
+                if run_key(params, player, run) not in finished]
+        print(f"{len(configs)} configurations, {len(jobs)} runs to go ({len(finished)} already in {args.out})")
+
+        start = time.perf_counter()
+        trim_partial_line(args.out)
+        with open(args.out, "a") as out, mp.Pool(args.workers) as pool:
+            for i, row in enumerate(pool.imap_unordered(_run, jobs, chunksize=4), 1):
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                done.append(row)
+                if i % 100 == 0 or i == len(jobs):
+                    print(f"  {i}/{len(jobs)} runs, {i / (time.perf_counter() - start):.1f} runs/sec")
+
+    if not done:
+        raise SystemExit(f"no results in {args.out}")
+    summary = summarize(done)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def game_dir(monkeypatch):
+    """Run from the game directory, where the image paths the simulation loads resolve."""
+    monkeypatch.chdir(ROOT)
+    return ROOT
@@ -0,0 +1,71 @@
+import random
+import pytest
+from lanes import LaneIndex
+
+NUM_LANES, LANE_WIDTH, MIN_GAP, CLEARANCE = 7, 54, 100, 130
+HEIGHT = 600
+
+
+def assert_invariants(index):
+    for lane in index.lanes:
+        assert lane == sorted(lane)
+        for higher, lower in zip(lane, lane[1:]):
+            assert lower - higher >= MIN_GAP
+
+
+def has_open_lane(index, lane, y):
+    return any(index.top_near(other, y) is None for other in range(index.num_lanes) if other != lane)
+
+
+def test_place_keeps_min_gap_above_lane_top():
+    index = LaneIndex(NUM_LANES, LANE_WIDTH, MIN_GAP, CLEARANCE)
+    first = index.place(0, -50)
+    assert first == -50
+    second = index.place(10, -60) # same lane, asked for a spot too close
+    assert second == first - MIN_GAP
+    assert index.top(0) == second
+
+
+def test_place_lifts_spawn_out_of_a_blocked_row():
+    index = LaneIndex(3, LANE_WIDTH, MIN_GAP, CLEARANCE)
+    index.place(0, -100)
+    index.place(LANE_WIDTH, -100)
+    y = index.place(2 * LANE_WIDTH, -100) # the row at -100 would have no lane left open
+    assert y <= -100 - CLEARANCE
+    assert has_open_lane(index, 2, y)
+
+
+def test_remove_forgets_only_that_asteroid():
+    index = LaneIndex(NUM_LANES, LANE_WIDTH, MIN_GAP, CLEARANCE)
+    a = index.place(0, -50)
+    b = index.place(0, -50)
+    index.advance(30)
+    index.remove(0, a + 30)
+    assert index.lanes[0] == [b]
+    index.remove(0, 12345) # not there: no effect
+    assert index.lanes[0] == [b]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_invariants_hold_through_a_scrolling_field(seed):
+    """Spawn, fall and respawn the way the simulation does, checking every placement."""
+    rng = random.Random(seed)
+    index = LaneIndex(NUM_LANES, LANE_WIDTH, MIN_GAP, CLEARANCE)
+    rocks = []
+    for _ in range(8):
+        x = rng.randrange(NUM_LANES) * LANE_WIDTH
+        rocks.append([x, index.place(x, rng.randint(-HEIGHT, -50))])
+    for _ in range(5000):
+        speed = rng.randint(4, 9)
+        index.advance(speed)
+        for rock in rocks:
+            rock[1] += speed
+            if rock[1] > HEIGHT:
+                index.remove(*rock)
+                lane = rng.randrange(NUM_LANES)
+                rock[0] = lane * LANE_WIDTH
+                rock[1] = index.place(rock[0], rng.randint(-HEIGHT, -50))
+                assert rock[1] <= -50
+                assert has_open_lane(index, lane, rock[1])
+        assert_invariants(index)
+        assert sum(len(lane) for lane in index.lanes) == len(rocks)
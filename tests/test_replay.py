@@ -0,0 +1,73 @@
+import pytest
+from difficulty import Difficulty, Level
+from replay import Replay, ReplayPlayer
+from simulation import SimConfig, Simulation, load_shapes
+from sweep import dodge_player
+
+SHIP = "images/spaceship.png"
+# Gentle enough for the sweep's dodging player to last a while, with every spawn pattern
+# and a few level changes early on
+CONFIG = SimConfig(asteroid_speed=3, num_asteroids=2, difficulty=Difficulty([
+    Level(0), Level(5, speed=1, asteroids=1, patterns=("pair",)),
+    Level(15, speed=2, asteroids=1, patterns=("stairs", "scatter"))]))
+
+
+@pytest.fixture(scope="module")
+def shapes():
+    return load_shapes(SHIP)
+
+
+def record_run(shapes, seed, max_frames=3000):
+    """Play and record a run with the sweep's dodging player. Returns (replay, finished sim)."""
+    sim = Simulation(shapes, CONFIG, seed)
+    replay = Replay(sim.seed, SHIP)
+    policy = dodge_player(seed)
+    while sim.alive and sim.frame < max_frames:
+        left, right = policy(sim)
+        replay.record(left, right)
+        sim.step(left, right)
+    return replay, sim
+
+
+def state(sim):
+    return (sim.frame, sim.alive, sim.score, sim.gems, sim.num_shields, sim.player_x, sim.level,
+            [(rock.x, rock.y) for rock in sim.asteroids])
+
+
+def test_save_and_load_round_trip(shapes, tmp_path):
+    replay, _ = record_run(shapes, seed=7)
+    path = tmp_path / "run.aarp"
+    replay.save(str(path))
+    loaded = Replay.load(str(path))
+    assert (loaded.seed, loaded.ship, loaded.frames) == (replay.seed, replay.ship, replay.frames)
+    assert [loaded.inputs(i) for i in range(loaded.frames)] == [replay.inputs(i) for i in range(replay.frames)]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 2**64 - 1])
+def test_playback_matches_recorded_run(shapes, tmp_path, seed):
+    replay, sim = record_run(shapes, seed)
+    path = tmp_path / "run.aarp"
+    replay.save(str(path))
+    played = ReplayPlayer(Replay.load(str(path)), shapes, CONFIG).play()
+    assert state(played) == state(sim)
+
+
+def test_seek_matches_straight_playback(shapes):
+    replay, sim = record_run(shapes, seed=3)
+    assert replay.frames > 300
+    player = ReplayPlayer(replay, shapes, CONFIG, snapshot_interval=100)
+    player.build_index()
+    for frame in (replay.frames // 2, 5, replay.frames, 150, 0, 250):
+        expected = ReplayPlayer(replay, shapes, CONFIG).play(frame)
+        assert state(player.seek(frame)) == state(expected)
+        # A restored snapshot has to carry everything later steps depend on
+        assert state(player.play()) == state(sim)
+
+
+def test_load_rejects_truncated_file(shapes, tmp_path):
+    replay, _ = record_run(shapes, seed=4)
+    path = tmp_path / "run.aarp"
+    replay.save(str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        Replay.load(str(path))
@@ -0,0 +1,60 @@
+import json
+import pytest
+from savedata import SHIPS, VERSION, SaveData, migrate
+
+
+def unversioned_save():
+    """A save from before saves were versioned: only the first two ships, none selected."""
+    return {
+        "highscore": 42,
+        "gems": 60,
+        "spaceships": [
+            {"name": "SCF-13 Vanguard", "filename": "images/spaceship.png", "unlocked": False,
+             "selected": False, "cost": 0},
+            {"name": "Cargo Freighter", "filename": "images/spaceship2.png", "unlocked": True,
+             "selected": False, "cost": 50},
+        ],
+    }
+
+
+def test_migrate_unversioned_save():
+    data = migrate(unversioned_save())
+    assert data["version"] == VERSION
+    assert (data["highscore"], data["gems"]) == (42, 60)
+    assert [ship["filename"] for ship in data["spaceships"]] == [ship["filename"] for ship in SHIPS]
+    # Existing ships keep their state; added ones start locked unless free
+    assert data["spaceships"][1]["unlocked"]
+    assert not any(ship["unlocked"] for ship in data["spaceships"][2:])
+    # Nothing was selected, so the first ship is, and it is unlocked to be usable
+    assert [ship["selected"] for ship in data["spaceships"]].count(True) == 1
+    assert data["spaceships"][0]["selected"] and data["spaceships"][0]["unlocked"]
+
+
+def test_migrate_keeps_existing_selection():
+    old = unversioned_save()
+    old["spaceships"][1]["selected"] = True
+    data = migrate(old)
+    assert [ship["selected"] for ship in data["spaceships"]] == [False, True] + [False] * (len(SHIPS) - 2)
+
+
+def test_migrate_rejects_newer_version():
+    with pytest.raises(ValueError):
+        migrate({"version": VERSION + 1, "highscore": 0, "gems": 0, "spaceships": []})
+
+
+def test_unversioned_file_is_written_back_migrated(tmp_path):
+    path = tmp_path / "save-data.json"
+    path.write_text(json.dumps(unversioned_save()))
+    save = SaveData(str(path), delay=0)
+    save.close()
+    on_disk = json.loads(path.read_text())
+    assert on_disk == save.data
+    assert on_disk["version"] == VERSION
+
+
+def test_current_file_is_not_rewritten(tmp_path):
+    path = tmp_path / "save-data.json"
+    path.write_text(json.dumps(migrate(unversioned_save())))
+    before = path.stat().st_mtime_ns
+    SaveData(str(path), delay=0).close()
+    assert path.stat().st_mtime_ns == before
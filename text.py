@@ -0,0 +1,131 @@
+"""
+Text rendering caches.
+
+- font(): one pygame Font per (name, size) instead of a SysFont lookup on every call. With
+  use_font_cache(), the file each font name resolves to is also remembered on disk, so later
+  launches skip pygame's scan of the system fonts.
+- TextCache: rendered text surfaces keyed by (font, text, color), with LRU eviction.
+- Counter: lays numbers out from pre-rendered digit glyphs, for values that change every frame.
+- Pulse: pre-scaled copies of a surface for the menu's pulsing high-score text.
+"""
+
+import json
+import math
+import os
+from collections import OrderedDict
+import pygame
+from diskcache import write_file
+
+_fonts = {}
+_font_paths = {} # font name -> file, or None for pygame's default font
+_font_cache_path = None
+
+
+def use_font_cache(path):
+    global _font_cache_path
+    _font_cache_path = path
+    try:
+        with open(path, "r") as file:
+            paths = json.load(file)
+    except (OSError, ValueError):
+        return
+    # Drop fonts that have since been uninstalled
+    _font_paths.update({name: p for name, p in paths.items() if p is None or os.path.exists(p)})
+
+
+def font_path(name):
+    if name not in _font_paths:
+        _font_paths[name] = pygame.font.match_font(name)
+        if _font_cache_path:
+            write_file(_font_cache_path, json.dumps(_font_paths).encode("utf-8"))
+    return _font_paths[name]
+
+
+def font(name, size):
+    key = (name, size)
+    f = _fonts.get(key)
+    if f is None:
+        # Same lookup as pygame.font.SysFont, which falls back to the default font too
+        f = pygame.font.Font(font_path(name), size)
+        _fonts[key] = f
+    return f
+
+
+class TextCache:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+
+    def render(self, font_name, size, text, color):
+        key = (font_name, size, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font(font_name, size).render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def usage(self):
+        """(surfaces cached, bytes of pixels behind them)."""
+        surfaces = list(self.surfaces.values())
+        return len(surfaces), sum(s.get_pitch() * s.get_height() for s in surfaces)
+
+
+text_cache = TextCache()
+
+
+def render(font_name, size, text, color):
+    """Shared cached render; use for labels whose text comes from a small set of values."""
+    return text_cache.render(font_name, size, text, color)
+
+
+class Counter:
+    """Lays out `prefix` followed by an integer, composed from glyphs rendered once."""
+
+    def __init__(self, font_name, size, color, prefix=""):
+        f = font(font_name, size)
+        self.prefix = f.render(prefix, True, color) if prefix else None
+        self.digits = [f.render(str(d), True, color) for d in range(10)]
+        self.minus = f.render("-", True, color)
+        self.height = f.get_height()
+
+    def layout(self, value, pos, out):
+        """Append the (glyph, position) pairs that draw value at pos to `out`; returns the rect they cover."""
+        x, y = pos
+        if self.prefix is not None:
+            out.append((self.prefix, (x, y)))
+            x += self.prefix.get_width()
+        if value < 0:
+            out.append((self.minus, (x, y)))
+            x += self.minus.get_width()
+        for ch in str(abs(value)):
+            glyph = self.digits[ord(ch) - 48]
+            out.append((glyph, (x, y)))
+            x += glyph.get_width()
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+
+class Pulse:
+    """
+    A surface that grows and shrinks by `amplitude` following sin(frame * speed). Each distinct
+    pixel size is smoothscaled once and reused on every later cycle.
+    """
+
+    def __init__(self, surface, amplitude, speed):
+        self.surface = surface
+        self.amplitude = amplitude
+        self.speed = speed
+        self.base_size = surface.get_size()
+        self.frames = {}
+
+    def frame(self, n):
+        scale_factor = 1 + self.amplitude * math.sin(n * self.speed)
+        new_size = (int(self.base_size[0] * scale_factor), int(self.base_size[1] * scale_factor))
+        scaled = self.frames.get(new_size)
+        if scaled is None:
+            scaled = pygame.transform.smoothscale(self.surface, new_size)
+            self.frames[new_size] = scaled
+        return scaled